@@ -35,6 +35,7 @@ setuptools.setup(
         "networkx",
         "owlready2",
         "pandas",
+        "rdflib",
         "pyvis==0.1.9",
     ],
 )
@@ -19,21 +19,36 @@
 # along with ontor.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import bisect
 import csv
+import bz2
+import collections
 import datetime
+import functools
+import gzip
+import hashlib
 import importlib.resources as pkg_resources
+import itertools
 import json
 import logging
+import lzma
+import math
 import os
 import random
 import re
+import sqlite3
 import string
 import sys
 import textwrap
+import threading
+import time
 import traceback
 import typing
-from contextlib import contextmanager
-from io import StringIO
+import uuid
+import weakref
+import webbrowser
+from contextlib import ExitStack, closing, contextmanager
+from io import BytesIO, StringIO
 
 import networkx as nx
 import pandas as pd
@@ -69,7 +84,15 @@ from owlready2 import (
     Or,
     ClassConstruct,
 )
+from owlready2.driver import INT_DATATYPES, FLOAT_DATATYPES
+from owlready2.sparql.main import PreparedSelectQuery
+from pyvis.edge import Edge
 from pyvis.network import Network
+from pyvis.node import Node
+from rdflib import BNode, Literal, URIRef, Variable
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.query import ResultRow
 
 from . import config
 from . import queries
@@ -78,6 +101,19 @@ from . import queries
 LOGFILE = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + "_ontor.log"
 logging.basicConfig(filename=LOGFILE, level=logging.DEBUG)
 
+_COMPRESSORS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+_COMPRESSION_EXTENSIONS = {"gz": "gzip", "bz2": "bz2", "xz": "xz"}
+_QUERY_CACHE_SIZE = 256
+_RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+# node categories for coloring visualizations by the types defining them
+_NODE_CATEGORIES = {
+    "class": base.owl_class,
+    "instance": base.owl_named_individual,
+    "object_property": base.owl_object_property,
+    "data_property": base.owl_data_property,
+    "restriction": base.owl_restriction,
+}
+
 
 def load_csv(csv_file: str, load_first_line: bool = False) -> list:
     """load data from CSV file
@@ -86,12 +122,25 @@ def load_csv(csv_file: str, load_first_line: bool = False) -> list:
     :param load_first_line: indicates whether content from first row is also returned
     :return: CSV contents as list of lists
     """
-    with open(csv_file) as f:
-        if load_first_line:
-            data = list(csv.reader(f))
-        else:
-            data = list(csv.reader(f))[1:]
-    return data
+    return [row for chunk in iter_csv(csv_file, load_first_line) for row in chunk]
+
+
+def iter_csv(
+    csv_file: str, load_first_line: bool = False, chunk_size: int = 10000
+) -> typing.Iterator[list]:
+    """stream data from CSV file in chunks of rows with bounded memory
+
+    :param csv_file: input CSV file
+    :param load_first_line: indicates whether content from first row is also returned
+    :param chunk_size: maximum number of rows per chunk
+    :return: generator of lists of rows
+    """
+    with open(csv_file, newline="") as f:
+        reader = csv.reader(f)
+        if not load_first_line:
+            next(reader, None)
+        while chunk := list(itertools.islice(reader, chunk_size)):
+            yield chunk
 
 
 def load_json(json_file: str) -> typing.Union[dict, list]:
@@ -105,6 +154,172 @@ def load_json(json_file: str) -> typing.Union[dict, list]:
     return data
 
 
+def iter_json(
+    json_file: str, chunk_size: int = 10000, buffer_size: int = 2**16
+) -> typing.Iterator[list]:
+    """stream the elements of a top-level JSON array or the values of a JSON
+    lines file in chunks with bounded memory
+
+    :param json_file: input JSON file
+    :param chunk_size: maximum number of elements per chunk
+    :param buffer_size: number of characters read from the file at once
+    :return: generator of lists of elements
+    """
+    with open(json_file) as f:
+        values = _iter_json_values(f, buffer_size)
+        while chunk := list(itertools.islice(values, chunk_size)):
+            yield chunk
+
+
+def _iter_json_values(f: typing.TextIO, buffer_size: int) -> typing.Iterator:
+    """
+    :param f: file containing a JSON array or whitespace separated JSON values
+    :param buffer_size: number of characters read from the file at once
+    :return: generator of the array's elements or the values
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, in_array = "", 0, False, None
+    while True:
+        separators = " \t\r\n," if in_array else " \t\r\n"
+        while pos < len(buffer) and buffer[pos] in separators:
+            pos += 1
+        if in_array is None and pos < len(buffer):
+            in_array = buffer[pos] == "["
+            pos += in_array
+            continue
+        if in_array and buffer[pos : pos + 1] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            end = None
+        # values may only be complete once the following character is read
+        if end is not None and (end < len(buffer) or eof):
+            yield value
+            pos = end
+            continue
+        if eof:
+            if pos < len(buffer) or in_array:
+                raise ValueError(f"incomplete JSON data in {f.name}")
+            return
+        data = f.read(buffer_size)
+        eof = not data
+        buffer, pos = buffer[pos:] + data, 0
+
+
+@functools.lru_cache(maxsize=None)
+def _read_query(name: str) -> str:
+    """
+    :param name: filename of a SPARQL query bundled with ontor
+    :return: the query's text
+    """
+    return pkg_resources.read_text(queries, name)
+
+
+@functools.lru_cache(maxsize=_QUERY_CACHE_SIZE)
+def _prepare_query(query: str, bindings: tuple):
+    """parse and translate a SPARQL query once for repeated evaluation
+
+    :param query: SPARQL query
+    :param bindings: tuple of (prefix, namespace) pairs
+    :return: prepared rdflib query
+    """
+    return prepareQuery(query, initNs=dict(bindings))
+
+
+def _normalize_query(query: str) -> str:
+    """collapse whitespace outside of string literals, e.g., to identify
+    queries differing only in their formatting
+
+    :param query: SPARQL query
+    :return: normalized query
+    """
+    return re.sub(
+        r"(\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*')|\s+",
+        lambda m: m.group(1) or " ",
+        query,
+    ).strip()
+
+
+def _algebra_nodes(node, skip: frozenset = frozenset()) -> typing.Iterator:
+    """walk a translated rdflib query
+
+    :param node: part of the query's algebra
+    :param skip: keys of algebra nodes whose parts are not walked
+    :return: generator of algebra nodes and variables within the part
+    """
+    if isinstance(node, (CompValue, Variable)):
+        yield node
+    if isinstance(node, dict):
+        children = [
+            v for k, v in node.items() if not k.startswith("_") and k not in skip
+        ]
+    elif isinstance(node, (list, tuple)):
+        children = node
+    else:
+        return
+    for child in children:
+        yield from _algebra_nodes(child, skip)
+
+
+def _shared_optional_vars(algebra) -> set:
+    """find variables bound only within several OPTIONAL clauses, which
+    Owlready2's SPARQL engine does not evaluate like rdflib
+
+    :param algebra: algebra of a translated rdflib query
+    :return: names of such variables
+    """
+    counts = collections.Counter()
+    for node in _algebra_nodes(algebra):
+        if isinstance(node, CompValue) and node.name == "LeftJoin":
+            counts.update(
+                {
+                    v
+                    for v in _algebra_nodes([node.p2, node.expr])
+                    if isinstance(v, Variable)
+                }
+            )
+    # projections and aggregates do not bind variables
+    outside = _algebra_nodes(algebra, frozenset(["p2", "expr", "PV", "A"]))
+    return {f"?{var}" for var, count in counts.items() if count > 1} - {
+        f"?{var}" for var in outside if isinstance(var, Variable)
+    }
+
+
+def _computed_vars(algebra) -> set:
+    """find the variables whose values are computed, e.g., by aggregates or
+    BIND, instead of read from the onto's triples
+
+    :param algebra: algebra of a translated rdflib query
+    :return: names of such variables
+    """
+    nodes = [n for n in _algebra_nodes(algebra) if isinstance(n, CompValue)]
+    # samples, e.g., of grouped variables, return values as stored
+    aggregates = {
+        n.res: n.name != "Aggregate_Sample"
+        for n in nodes
+        if n.name.startswith("Aggregate_")
+    }
+    return {
+        str(n.var)
+        for n in nodes
+        if n.name == "Extend"
+        and (not isinstance(n.expr, Variable) or aggregates.get(n.expr, False))
+    }
+
+
+def _file_hash(path: str) -> str:
+    """
+    :param path: path to file
+    :return: SHA-256 hex digest of the file's contents
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
 def cleanup(complete: bool, *extensions: str) -> None:
     """delete all files in the current directory with the extensions specified
 
@@ -120,6 +335,58 @@ def cleanup(complete: bool, *extensions: str) -> None:
             os.remove(os.path.join(this_dir, f))
 
 
+def _instrumented(func: typing.Callable) -> typing.Callable:
+    """decorator for OntoEditor methods whose calls are recorded in the
+    editor's metrics, if any, including the rows changed in the quadstore and
+    the bytes written to files during the call
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return func(self, *args, **kwargs)
+        changes, written = self._total_changes(), self._bytes_written
+        start = time.perf_counter()
+        error = True
+        try:
+            result = func(self, *args, **kwargs)
+            error = False
+            return result
+        finally:
+            self.metrics.record(
+                func.__name__,
+                time.perf_counter() - start,
+                triples=max(self._total_changes() - changes, 0),
+                bytes_written=self._bytes_written - written,
+                error=error,
+            )
+
+    return wrapper
+
+
+def _mutator(func: typing.Callable) -> typing.Callable:
+    """decorator for OntoEditor methods that modify the onto; serializes them
+    with each other and with background saves, bumps the editor's revision,
+    marks the current edit session as changed if they fail partway, and
+    records their calls in the editor's metrics
+    """
+    instrumented = _instrumented(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            try:
+                return instrumented(self, *args, **kwargs)
+            except BaseException:
+                if self._session_depth:
+                    self._dirty = True
+                raise
+            finally:
+                self._revision += 1
+
+    return wrapper
+
+
 class InfoException(Exception):
     """exception for invalid ontor inputs"""
 
@@ -128,6 +395,429 @@ class InfoException(Exception):
         self.info = kwargs
 
 
+class QueryLimitError(Exception):
+    """exception for queries exceeding their time or result limits or being
+    cancelled"""
+
+
+class LoadCache:
+    """size-bounded on-disk LRU cache of parsed ontology files; entries are
+    SQLite quadstores keyed by the file's path, modification time, and content hash
+    NOTE: imported ontologies are cached along with the importing ontology
+    """
+
+    _index_name = "index.json"
+
+    def __init__(self, directory: str = None, max_size: int = 2**31) -> None:
+        """
+        :param directory: cache directory, defaults to ~/.cache/ontor
+        :param max_size: maximum total size of the cache entries in bytes
+        """
+        self.directory = directory or os.path.join(
+            os.path.expanduser("~"), ".cache", "ontor"
+        )
+        self.max_size = max_size
+        self.logger = logging.getLogger("load_cache")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _read_index(self) -> dict:
+        try:
+            return load_json(os.path.join(self.directory, self._index_name))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"files": {}, "ontologies": {}}
+
+    def _write_index(self, index: dict) -> None:
+        index_path = os.path.join(self.directory, self._index_name)
+        with open(index_path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(index_path + ".tmp", index_path)
+
+    @staticmethod
+    def _content_hash(path: str, index: dict) -> str:
+        """hash the file's contents; only rehashes if size or mtime have changed
+
+        :param path: path to the ontology file
+        :param index: cache index, updated with the file's hash
+        :return: SHA-256 hex digest of the file's contents
+        """
+        stat = os.stat(path)
+        abspath = os.path.abspath(path)
+        known = index["files"].get(abspath)
+        fingerprint = [stat.st_mtime_ns, stat.st_size]
+        if known and [known["mtime"], known["size"]] == fingerprint:
+            return known["hash"]
+        content_hash = _file_hash(path)
+        index["files"][abspath] = {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": content_hash,
+        }
+        return content_hash
+
+    def _entry(self, content_hash: str) -> str:
+        return os.path.join(self.directory, content_hash + ".sqlite3")
+
+    def _entries(self) -> list:
+        """
+        :return: paths of the cache entries, i.e., without other files in the
+            cache directory
+        """
+        return [
+            os.path.join(self.directory, f)
+            for f in os.listdir(self.directory)
+            if re.fullmatch(r"[0-9a-f]{64}\.sqlite3", f)
+        ]
+
+    def load(self, path: str):
+        """load a parsed ontology file from the cache into a new in-memory world
+
+        :param path: path to the ontology file
+        :return: onto, None if the file is not cached
+        """
+        index = self._read_index()
+        content_hash = self._content_hash(path, index)
+        self._write_index(index)
+        base_iri = index["ontologies"].get(content_hash)
+        entry = self._entry(content_hash)
+        if not base_iri or not os.path.isfile(entry):
+            return None
+        connection = sqlite3.connect(
+            ":memory:", isolation_level="EXCLUSIVE", check_same_thread=False
+        )
+        with closing(sqlite3.connect(entry)) as cached:
+            cached.backup(connection)
+        # mark entry as recently used
+        os.utime(entry)
+        # NOTE: the entry is only read, all changes affect the in-memory connection
+        world = World(filename=entry, connection=connection)
+        return world.get_ontology(base_iri).load()
+
+    def store(self, path: str, onto) -> None:
+        """add a freshly parsed ontology file to the cache
+
+        :param path: path to the ontology file
+        :param onto: onto loaded from path, including its world
+        """
+        index = self._read_index()
+        content_hash = self._content_hash(path, index)
+        entry = self._entry(content_hash)
+        onto.world.graph.commit()
+        with closing(sqlite3.connect(entry + ".tmp")) as target:
+            onto.world.graph.db.backup(target)
+        os.replace(entry + ".tmp", entry)
+        index["ontologies"][content_hash] = onto.base_iri
+        self._evict(index)
+        self._write_index(index)
+
+    def _evict(self, index: dict) -> None:
+        """remove least recently used entries until the cache size limit is met"""
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        total = sum(os.path.getsize(e) for e in entries)
+        while entries and total > self.max_size:
+            entry = entries.pop(0)
+            total -= os.path.getsize(entry)
+            os.remove(entry)
+            index["ontologies"].pop(os.path.basename(entry).rsplit(".", 1)[0], None)
+            self.logger.info(f"evicted cache entry {entry}")
+
+    def clear(self) -> None:
+        """remove all cache entries and the cache index; other files in the
+        cache directory are kept
+        """
+        for entry in self._entries():
+            os.remove(entry)
+        index_path = os.path.join(self.directory, self._index_name)
+        if os.path.isfile(index_path):
+            os.remove(index_path)
+
+
+class QueryCache:
+    """in-memory LRU cache of query results; results are cached per editor and
+    discarded once the editor's revision changes, so they are only reused
+    between modifications of the onto
+    NOTE: changes made directly via Owlready2 do not invalidate results
+    """
+
+    def __init__(self, max_entries: int = 256, max_rows: int = 10**6) -> None:
+        """
+        :param max_entries: maximum number of cached results
+        :param max_rows: maximum total number of cached result rows; larger
+            results are not cached
+        """
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, version: tuple) -> typing.Optional[list]:
+        """get cached results if they were computed for the given version
+
+        :param key: cache key, e.g., including the normalized query
+        :param version: version of the onto, e.g., the editor's revision
+        :return: results, None if not cached or outdated
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, version: tuple, results: list) -> None:
+        """cache results and evict least recently used results until the
+        limits are met
+
+        :param key: cache key
+        :param version: version of the onto the results were computed for
+        :param results: results, not to be modified afterwards
+        """
+        size = self._size(results)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_rows:
+                return
+            self._entries[key] = (version, results, size)
+            self._rows += size
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._rows -= entry[2]
+
+    @staticmethod
+    def _size(results: list) -> int:
+        """count result rows, including those of nested result lists"""
+        return sum(
+            QueryCache._size(elem) if isinstance(elem, list) else 1 for elem in results
+        )
+
+    @property
+    def stats(self) -> dict:
+        """hits, misses, evictions, and the current number of results and rows"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "rows": self._rows,
+            }
+
+    def clear(self) -> None:
+        """remove all cached results and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+class Metrics:
+    """in-process registry of call counts, errors, latency histograms, rows
+    changed in the quadstore, i.e., triples touched, and bytes written per
+    operation of the editors it is passed to; may be shared between editors
+    """
+
+    default_buckets = (0.001, 0.01, 0.1, 1.0, 10.0, 100.0)
+
+    def __init__(self, buckets: typing.Sequence[float] = None) -> None:
+        """
+        :param buckets: upper bounds of the latency histograms' buckets in
+            seconds, defaults to powers of ten from 1 ms to 100 s
+        """
+        self.buckets = tuple(sorted(buckets or self.default_buckets))
+        self.hooks: typing.List[typing.Callable] = []
+        self.logger = logging.getLogger("metrics")
+        self._operations: typing.Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        triples: int = 0,
+        bytes_written: int = 0,
+        error: bool = False,
+    ) -> None:
+        """record a call and pass it on to the hooks
+
+        :param operation: name of the operation, e.g., the method called
+        :param seconds: duration of the call
+        :param triples: number of rows changed in the quadstore
+        :param bytes_written: number of bytes written to files
+        :param error: whether the call raised an exception
+        """
+        with self._lock:
+            stats = self._operations.setdefault(
+                operation,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "seconds": 0.0,
+                    "triples": 0,
+                    "bytes_written": 0,
+                    "buckets": [0] * len(self.buckets),
+                },
+            )
+            stats["calls"] += 1
+            stats["errors"] += error
+            stats["seconds"] += seconds
+            stats["triples"] += triples
+            stats["bytes_written"] += bytes_written
+            bucket = bisect.bisect_left(self.buckets, seconds)
+            if bucket < len(self.buckets):
+                stats["buckets"][bucket] += 1
+        for hook in list(self.hooks):
+            try:
+                hook(operation, seconds, triples, bytes_written, error)
+            except Exception as err:
+                self.logger.warning(f"metrics hook {hook!r} failed: {err!r}")
+
+    def to_dict(self) -> dict:
+        """
+        :return: metrics per operation; histograms map each bucket's upper
+            bound to the number of calls at most as long, i.e., cumulatively
+        """
+        with self._lock:
+            return {
+                operation: {
+                    **{k: v for k, v in stats.items() if k != "buckets"},
+                    "histogram": dict(
+                        zip(
+                            [*map(str, self.buckets), "+Inf"],
+                            [*itertools.accumulate(stats["buckets"]), stats["calls"]],
+                        )
+                    ),
+                }
+                for operation, stats in sorted(self._operations.items())
+            }
+
+    def to_json(self) -> str:
+        """
+        :return: metrics as JSON, see to_dict
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "ontor") -> str:
+        """
+        :param prefix: prefix of the metrics' names
+        :return: metrics in the Prometheus text exposition format
+        """
+        metrics = self.to_dict()
+        lines = []
+        for name, key, doc in [
+            ("calls_total", "calls", "number of calls"),
+            ("errors_total", "errors", "number of calls raising exceptions"),
+            ("triples_total", "triples", "number of rows changed in the quadstore"),
+            ("bytes_written_total", "bytes_written", "number of bytes written"),
+        ]:
+            lines += [
+                f"# HELP {prefix}_{name} {doc}",
+                f"# TYPE {prefix}_{name} counter",
+            ]
+            lines += [
+                f'{prefix}_{name}{{operation="{op}"}} {stats[key]}'
+                for op, stats in metrics.items()
+            ]
+        name = f"{prefix}_duration_seconds"
+        lines += [f"# HELP {name} duration of calls", f"# TYPE {name} histogram"]
+        for op, stats in metrics.items():
+            lines += [
+                f'{name}_bucket{{operation="{op}",le="{le}"}} {count}'
+                for le, count in stats["histogram"].items()
+            ]
+            lines += [
+                f'{name}_sum{{operation="{op}"}} {stats["seconds"]}',
+                f'{name}_count{{operation="{op}"}} {stats["calls"]}',
+            ]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """discard all recorded metrics"""
+        with self._lock:
+            self._operations.clear()
+
+
+class _BackgroundSaver(threading.Thread):
+    """daemon thread that saves an editor's onto to file; save requests that
+    arrive while a save is in progress are coalesced into a single save
+    NOTE: the editor is only referenced while saves are pending so that idle
+    editors can be garbage collected, which stops the thread; pending saves
+    are written when the editor is closed or at interpreter exit
+    """
+
+    def __init__(self, editor: "OntoEditor") -> None:
+        threading.Thread.__init__(self, name="ontor-saver", daemon=True)
+        self.editor: typing.Optional["OntoEditor"] = None
+        self.condition = threading.Condition()
+        self.requested = 0
+        self.written = 0
+        self.stopped = False
+        self.error: typing.Optional[Exception] = None
+        self.finalizer = weakref.finalize(editor, self.stop)
+        self.start()
+
+    def request(self, editor: "OntoEditor") -> None:
+        with self.condition:
+            self.editor = editor
+            self.requested += 1
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.written < self.requested or self.stopped
+                )
+                if self.written >= self.requested:
+                    return
+                target = self.requested
+                editor = self.editor
+            try:
+                editor._write_file()
+            except Exception as exc:
+                editor.logger.error(f"background save failed: {exc!r}")
+                self.error = exc
+            with self.condition:
+                self.written = target
+                if self.written >= self.requested:
+                    self.editor = None
+                self.condition.notify_all()
+            del editor
+
+    def pending(self) -> bool:
+        """
+        :return: True iff saves have been requested but not written yet
+        """
+        with self.condition:
+            return self.written < self.requested
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        :param timeout: maximum time to wait in seconds, waits indefinitely if None
+        :return: True iff all saves requested so far have been written
+        """
+        with self.condition:
+            target = self.requested
+            return self.condition.wait_for(lambda: self.written >= target, timeout)
+
+    def stop(self) -> None:
+        """write pending saves and end the thread"""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if threading.current_thread() is not self:
+            self.join()
+
+
 class OntoEditor:
     """create, load, and edit ontologies"""
 
@@ -150,30 +840,109 @@ class OntoEditor:
         "time": datetime.time,
         "datetime": datetime.datetime,
     }
+    # maximum number of nodes positioned by the spring layout unless a layout
+    # is specified, as it takes quadratic time per iteration
+    _default_layout_limit = 2000
 
-    def __init__(self, iri: str, path: str, import_paths: list = None) -> None:
+    def __init__(
+        self,
+        iri: str,
+        path: str,
+        import_paths: list = None,
+        quadstore: str = None,
+        load_cache: "LoadCache" = None,
+        journal: bool = False,
+        journal_threshold: int = 2**26,
+        background_save: bool = False,
+        query_cache: "QueryCache" = None,
+        metrics: "Metrics" = None,
+    ) -> None:
         """tries to load onto from file specified, creates new file if none is available
 
         :param iri: ontology's IRI
         :param path: path to local ontology file or URL; local is checked first
         :param import_paths: list of local directories to be checked for imports
+        :param quadstore: path to an SQLite quadstore (optional); if specified,
+            changes are committed to the quadstore instead of being saved to path,
+            and path is only parsed if the quadstore does not contain the onto yet
+        :param load_cache: cache of parsed ontology files (optional); if specified,
+            unchanged files are not parsed again when loaded
+        :param journal: append changes to a journal next to the ontology file
+            instead of rewriting the file; ignored for quadstores
+        :param journal_threshold: journal size in bytes above which the journal
+            is compacted into the ontology file
+        :param background_save: save to file in a background thread that
+            coalesces pending saves and writes atomically; use flush or close
+            to wait for saves to complete; ignored for quadstores and journals
+        :param query_cache: cache of query results (optional); if specified,
+            results of query_onto and get_axioms are reused until the onto is
+            modified
+        :param metrics: registry recording the calls of modifying methods,
+            queries, exports, saves, and visualizations (optional)
         """
         self.iri = iri
         self.path = path
+        self.quadstore = quadstore
+        self.load_cache = load_cache
+        self.journal = journal and not quadstore
+        self.journal_threshold = journal_threshold
+        self._lock = threading.RLock()
+        self._revision = 0
+        self._graph_cache: typing.Optional[tuple] = None
+        self._category_cache: typing.Optional[tuple] = None
+        self._adjacency_cache: typing.Optional[tuple] = None
+        self._hierarchy_cache: typing.Optional[tuple] = None
+        self._layout_cache: typing.Optional[tuple] = None
+        self.query_cache = query_cache
+        self._cache_token = object()
+        self.metrics = metrics
+        self._bytes_written = 0
+        self._label_index: typing.Optional[tuple] = None
+        self._saver = None
+        if background_save and not quadstore and not journal:
+            self._saver = _BackgroundSaver(self)
         self.filename = path.split(sep="/")[-1]
         self.logger = logging.getLogger(self.filename.split(".")[0])
-        self.query_prefixes = pkg_resources.read_text(queries, "prefixes.sparql")
+        self.query_prefixes = _read_query("prefixes.sparql")
+        self._session_depth = 0
+        self._session_snapshot: typing.Optional[bytes] = None
+        self._dirty = False
         onto_path.extend(list({path.rsplit("/", 1)[0]} - set(onto_path)))
         if import_paths:
             onto_path.extend(list(set(import_paths) - set(onto_path)))
-        self.onto_world = World()
+        if self.quadstore:
+            self._open_quadstore()
+            return
         try:
-            self.onto = self.onto_world.get_ontology(self.path).load()
+            self.onto = self._load_file()
+            self.onto_world = self.onto.world
             self.logger.info("successfully loaded ontology specified")
+        except FileNotFoundError:
+            self.onto_world = World()
+            self.onto = self.onto_world.get_ontology(self.iri)
+            self._save_to_file(self.path)
+            self.logger.info("ontology file did not exist - created a new one")
+        if self.journal:
+            self._attach_journal()
+            self._replay_journal()
+
+    def _open_quadstore(self) -> None:
+        """open the SQLite quadstore; the onto is only loaded from file or created
+        if the quadstore does not contain it yet
+        """
+        self.onto_world = World(filename=self.quadstore)
+        stored_iris = {iri.rstrip("#/") for iri in self.onto_world.ontologies}
+        if self.iri.rstrip("#/") in stored_iris:
+            self.onto = self.onto_world.get_ontology(self.iri)
+            self.logger.info("successfully opened ontology from quadstore")
+            return
+        try:
+            self.onto = self.onto_world.get_ontology(self.path).load()
+            self.logger.info("successfully loaded ontology specified into quadstore")
         except FileNotFoundError:
             self.onto = self.onto_world.get_ontology(self.iri)
-            self.onto.save(file=self.path)
             self.logger.info("ontology file did not exist - created a new one")
+        self.onto_world.save()
 
     @contextmanager
     def _redirect_to_log(self) -> typing.Iterator[None]:
@@ -202,15 +971,433 @@ class OntoEditor:
     def _indent_log(info: str) -> str:
         return textwrap.indent(info, ">   ")
 
+    def _load_file(self):
+        """load the onto file into a new world; the load cache is used if available
+
+        :return: onto loaded
+        """
+        cacheable = self.load_cache and os.path.isfile(self.path)
+        if cacheable:
+            onto = self.load_cache.load(self.path)
+            if onto:
+                self.logger.info("loaded ontology from cache")
+                return onto
+        onto = World().get_ontology(self.path).load()
+        if cacheable:
+            self.load_cache.store(self.path, onto)
+        return onto
+
     def _reload_from_file(self) -> None:
         try:
-            self.onto_world = World()
-            self.onto = self.onto_world.get_ontology(self.path).load()
+            self.onto = self._load_file()
+            self.onto_world = self.onto.world
             self.logger.info("successfully reloaded ontology from file")
+            if self.journal:
+                self._attach_journal()
+                self._replay_journal()
         except FileNotFoundError:
             self.logger.error("ontology file did not exist")
             sys.exit(1)
 
+    def _reload_from_bytes(self, data: bytes) -> None:
+        """replace the onto by the ntriples serialization specified without
+        accessing the ontology file
+
+        :param data: onto serialized as ntriples
+        """
+        base_iri = self.onto.base_iri
+        if self.quadstore:
+            self.onto.load(fileobj=BytesIO(data), format="ntriples", reload=True)
+            self.logger.info("successfully reloaded ontology from memory")
+            return
+        self.onto_world = World()
+        self.onto = self.onto_world.get_ontology(base_iri).load(
+            fileobj=BytesIO(data), format="ntriples"
+        )
+        self.logger.info("successfully reloaded ontology from memory")
+        if self.journal:
+            self._attach_journal()
+
+    def _serialize(self, onto=None) -> bytes:
+        """serialize an onto as ntriples in memory
+
+        :param onto: onto to be serialized, defaults to the editor's onto
+        :return: ntriples serialization
+        """
+        buffer = BytesIO()
+        (onto or self.onto).save(file=buffer, format="ntriples")
+        return buffer.getvalue()
+
+    def _load_copy(self):
+        """load the onto's current state into a new world, e.g., for reasoning;
+        unsaved changes from an edit session are included
+
+        :return: copy of the onto
+        """
+        if not self._dirty and not self.quadstore and not self.journal:
+            self.flush()
+            return self._load_file()
+        return (
+            World()
+            .get_ontology(self.onto.base_iri)
+            .load(fileobj=BytesIO(self._serialize()), format="ntriples")
+        )
+
+    @_instrumented
+    def _save(self) -> None:
+        """save the onto to file or commit it to the quadstore unless saving is
+        deferred by an edit session
+        """
+        if self._session_depth:
+            self._dirty = True
+            return
+        if self.quadstore:
+            self.onto_world.save()
+        elif self.journal:
+            self._write_journal()
+        elif self._saver:
+            self._saver.request(self)
+        else:
+            self._save_to_file(self.path)
+        self._dirty = False
+
+    def _save_to_file(self, path: str) -> None:
+        """save the onto as RDF/XML and count the bytes written
+
+        :param path: path including filename
+        """
+        self.onto.save(file=path)
+        self._bytes_written += os.path.getsize(path)
+
+    def _total_changes(self) -> int:
+        """
+        :return: number of rows changed in the quadstore's connection so far
+        """
+        return self.onto_world.graph.db.total_changes
+
+    @_instrumented
+    def _write_file(self) -> None:
+        """serialize the onto while holding the lock and write it atomically;
+        skipped during edit sessions, which save on commit
+        """
+        with self._lock:
+            if self._session_depth:
+                return
+            path = self.path
+            buffer = BytesIO()
+            self.onto.save(file=buffer)
+        # per thread, a session may write while a background save is running
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        self._bytes_written += buffer.tell()
+
+    def flush(self, timeout: float = None) -> bool:
+        """wait until all background saves requested so far are written to file
+
+        :param timeout: maximum time to wait in seconds, waits indefinitely if None
+        :return: True iff all saves have been written
+        """
+        if not self._saver:
+            return True
+        done = self._saver.wait(timeout)
+        if self._saver.error:
+            error, self._saver.error = self._saver.error, None
+            raise error
+        return done
+
+    def close(self) -> None:
+        """write pending background saves and stop the background thread;
+        later saves are written directly
+        """
+        if not self._saver:
+            return
+        saver, self._saver = self._saver, None
+        saver.finalizer()
+        if saver.error:
+            raise saver.error
+
+    def __enter__(self) -> "OntoEditor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @_mutator
+    def begin_session(self, snapshot: bool = True) -> None:
+        """start an edit session, i.e., defer saving until commit is called
+        NOTE: nested sessions are merged into the outermost session
+
+        :param snapshot: keep an in-memory copy of the onto to be restored on
+            rollback; without it, which saves serializing large ontos, rollback
+            reloads the onto from file
+        """
+        if not self._session_depth and self._saver and self._saver.pending():
+            # the file must hold the state before the session for rollbacks,
+            # background saves are skipped until the session ends
+            self._write_file()
+        if not self._session_depth and not self.quadstore and snapshot:
+            self._session_snapshot = self._serialize()
+        self._session_depth += 1
+
+    @_mutator
+    def commit(self) -> None:
+        """end the current edit session; the onto is saved once when the
+        outermost session is committed and there are unsaved changes
+        """
+        if not self._session_depth:
+            self.logger.info("commit: no active edit session")
+            return
+        self._session_depth -= 1
+        if not self._session_depth:
+            self._session_snapshot = None
+            if self._dirty:
+                self._save()
+
+    @_mutator
+    def rollback(self) -> None:
+        """discard all changes made in the current edit session and end it;
+        restores the in-memory snapshot taken when the session started, reloads
+        the onto from file for sessions without snapshot or, for quadstores,
+        reopens the quadstore without committing
+        NOTE: entities retrieved during the session must be retrieved again
+        """
+        if not self._session_depth:
+            self.logger.info("rollback: no active edit session")
+            return
+        if self.quadstore:
+            self.onto_world.close()
+            self._open_quadstore()
+        elif self._session_snapshot is not None:
+            self._reload_from_bytes(self._session_snapshot)
+        else:
+            self._reload_from_file()
+        self._session_depth = 0
+        self._session_snapshot = None
+        self._dirty = False
+
+    @contextmanager
+    def edit_session(self, snapshot: bool = True) -> typing.Iterator["OntoEditor"]:
+        """context manager for edit sessions; commits when the block is left
+        and rolls back if an exception is raised
+
+        :param snapshot: keep an in-memory copy of the onto for rollbacks, see
+            begin_session
+        :return: the editor itself
+        """
+        self.begin_session(snapshot)
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+
+    @property
+    def _journal_path(self) -> str:
+        return self.path + ".journal"
+
+    def _attach_journal(self) -> None:
+        """record all changes to the onto's triples in a temporary table using
+        SQLite triggers and start a new journal generation
+        NOTE: blank nodes are only journaled if they were created during the
+        current generation, changes to older blank nodes trigger a compaction
+        """
+        graph = self.onto_world.graph
+        c = self.onto.graph.c
+        graph.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS ontor_journal (op INTEGER, s, p, o, d)"
+        )
+        for table, d in [("objs", "NULL"), ("datas", "{row}.d")]:
+            for event, op, row in [("INSERT", 1, "new"), ("DELETE", -1, "old")]:
+                values = f"{op}, {row}.s, {row}.p, {row}.o, " + d.format(row=row)
+                graph.execute(
+                    f"CREATE TEMP TRIGGER IF NOT EXISTS ontor_{table}_{event} "
+                    f"AFTER {event} ON main.{table} WHEN {row}.c = {c} "
+                    f"BEGIN INSERT INTO ontor_journal VALUES ({values}); END"
+                )
+        graph.execute("DELETE FROM ontor_journal")
+        self._journal_generation = uuid.uuid4().hex[:8]
+        self._journal_blank = graph.execute(
+            "SELECT current_blank FROM store"
+        ).fetchone()[0]
+        self._journal_bnodes: dict = {}
+        self._journal_compaction_pending = False
+
+    def _bnode_label(self, storid: int) -> typing.Optional[str]:
+        """
+        :param storid: storid of a blank node
+        :return: journal label of the blank node, None if it was created before
+            the current journal generation
+        """
+        if storid in self._journal_bnodes:
+            return self._journal_bnodes[storid]
+        if -storid > self._journal_blank:
+            return f"_:{self._journal_generation}b{-storid}"
+        return None
+
+    def _format_ntriple(
+        self,
+        s,
+        p,
+        o,
+        d,
+        bnode_label: typing.Callable,
+        unabbreviate: typing.Callable = None,
+    ) -> str:
+        """format a triple from the quadstore as an ntriples line
+
+        :param s: subject's storid
+        :param p: predicate's storid
+        :param o: object's storid or literal value
+        :param d: literal's datatype storid or language tag, None for entities
+        :param bnode_label: function that returns a label for a blank node storid
+        :param unabbreviate: function that returns the iri for a storid, e.g.,
+            a cached one, defaults to the world's
+        :return: ntriples line
+        """
+        unabbreviate = unabbreviate or self.onto_world._unabbreviate
+
+        def _term(storid):
+            return bnode_label(storid) if storid < 0 else f"<{unabbreviate(storid)}>"
+
+        if d is None:
+            obj = _term(o)
+        else:
+            if isinstance(o, str):
+                o = o.replace("\\", "\\\\").replace('"', '\\"')
+                o = o.replace("\n", "\\n").replace("\r", "\\r")
+            if isinstance(d, str) and d.startswith("@"):
+                obj = f'"{o}"{d}'
+            elif d == 0:
+                obj = f'"{o}"'
+            else:
+                obj = f'"{o}"^^<{unabbreviate(d)}>'
+        return f"{_term(s)} <{unabbreviate(p)}> {obj} .\n"
+
+    def _write_journal(self) -> None:
+        """append the changes recorded since the last save to the journal;
+        compacts instead if blank nodes from earlier generations are affected
+        or if the journal exceeds its size threshold
+        """
+        graph = self.onto_world.graph
+        changes = graph.execute(
+            "SELECT op, s, p, o, d FROM ontor_journal ORDER BY rowid"
+        ).fetchall()
+        bnodes = [s for _, s, _, _, _ in changes if s < 0] + [
+            o for _, _, _, o, d in changes if d is None and o < 0
+        ]
+        if self._journal_compaction_pending or any(
+            self._bnode_label(b) is None for b in bnodes
+        ):
+            self.compact()
+            return
+        if not changes:
+            return
+        lines = [
+            ("+ " if op > 0 else "- ")
+            + self._format_ntriple(s, p, o, d, self._bnode_label)
+            for op, s, p, o, d in changes
+        ]
+        if not os.path.isfile(self._journal_path):
+            lines.insert(0, f"# snapshot {_file_hash(self.path)}\n")
+        with open(self._journal_path, "ab") as f:
+            start = f.tell()
+            f.write("".join(lines).encode("utf8"))
+            f.flush()
+            os.fsync(f.fileno())
+            self._bytes_written += f.tell() - start
+        graph.execute("DELETE FROM ontor_journal")
+        if os.path.getsize(self._journal_path) > self.journal_threshold:
+            self.compact()
+
+    def _replay_journal(self) -> None:
+        """apply the journal's changes to the onto loaded from the snapshot;
+        journals written for other snapshots are discarded, and an incomplete
+        last line, e.g., due to a crash while appending, is truncated
+        """
+        if not os.path.isfile(self._journal_path):
+            return
+        # read binary so that lines are only split at \n
+        with open(self._journal_path, "rb+") as f:
+            header = f.readline().decode("utf8").split()
+            valid = header[-1:] == [_file_hash(self.path)]
+            bnodes: dict = {}
+            offset = f.tell()
+            for number, line in enumerate(f if valid else [], start=2):
+                if not line.endswith(b" .\n"):
+                    if f.read(1):
+                        raise ValueError(f"corrupt journal line {number}")
+                    self.logger.warning("truncated incomplete last journal line")
+                    f.truncate(offset)
+                    break
+                self._apply_journal_line(line.decode("utf8"), bnodes)
+                offset += len(line)
+        if not valid:
+            self.logger.warning("discarded journal written for another snapshot")
+            os.remove(self._journal_path)
+            return
+        self._journal_bnodes = {storid: label for label, storid in bnodes.items()}
+        self.onto_world.graph.execute("DELETE FROM ontor_journal")
+        self.onto._load_properties()
+        self.logger.info("successfully replayed journal")
+
+    def _apply_journal_line(self, line: str, bnodes: dict) -> None:
+        """
+        :param line: journal line, i.e., an ntriples line prefixed with + or -
+        :param bnodes: mapping from blank node labels to storids, updated in place
+        """
+        op, s, p, o = line.rstrip()[:-1].rstrip().split(" ", 3)
+        abbreviate = self.onto_world._abbreviate
+
+        def _storid(term):
+            if term.startswith("_:"):
+                if term not in bnodes:
+                    bnodes[term] = self.onto_world.new_blank_node()
+                return bnodes[term]
+            return abbreviate(term[1:-1])
+
+        s, p = _storid(s), _storid(p)
+        if o.startswith(("<", "_:")):
+            if op == "+":
+                self.onto._add_obj_triple_raw_spo(s, p, _storid(o))
+            else:
+                self.onto._del_obj_triple_raw_spo(s, p, _storid(o))
+            return
+        value, d = o.rsplit('"', 1)
+        value = value[1:].encode("raw-unicode-escape").decode("unicode-escape")
+        if d.startswith("^^"):
+            datatype = d[3:-1]
+            d = abbreviate(datatype)
+            if datatype in INT_DATATYPES:
+                value = int(value)
+            elif datatype in FLOAT_DATATYPES:
+                value = float(value)
+        elif not d:
+            d = 0
+        if op == "+":
+            self.onto._add_data_triple_raw_spod(s, p, value, d)
+        else:
+            self.onto._del_data_triple_raw_spod(s, p, value, d)
+
+    @_mutator
+    def compact(self) -> None:
+        """write the onto to file as a new snapshot and discard the journal;
+        deferred until commit during edit sessions
+        """
+        if self._session_depth:
+            self._journal_compaction_pending = True
+            self._dirty = True
+            return
+        self._save_to_file(self.path + ".tmp")
+        os.replace(self.path + ".tmp", self.path)
+        if os.path.isfile(self._journal_path):
+            os.remove(self._journal_path)
+        self._attach_journal()
+        self.logger.info("compacted journal into ontology file")
+
     def _transform_to_dp_type(self, data_type: str, val):
         if data_type != "boolean":
             return self._dp_range_types[data_type](val)
@@ -219,6 +1406,7 @@ class OntoEditor:
         elif str(val).lower() == "true":
             return True
 
+    @_mutator
     def add_import(self, other_path: str) -> None:
         """load an additional onto
 
@@ -234,23 +1422,89 @@ class OntoEditor:
         onto_import = get_ontology(other_path).load()
         with self.onto:
             self.onto.imported_ontologies.append(onto_import)
-        self.onto.save(file=self.path)
+        self._save()
 
+    @_mutator
     def save_as(self, new_path: str) -> None:
         """safe ontology as new file
         helpful, e.g., if multiple ontos were loaded
 
         :param new_path: path including filename for saving the onto
         """
-        self.onto.save(file=new_path)
+        self._save_to_file(new_path)
         self.path = new_path
         self.filename = new_path.rsplit("/", 1)[1]
+        if self.journal:
+            self._attach_journal()
 
-    def export_ntriples(self) -> None:
-        """saves with same filename, but as ntriples"""
-        ntpath = self.path.rsplit(".", 1)[0] + ".nt"
-        self.onto.save(file=ntpath, format="ntriples")
+    @_instrumented
+    def export_rdfxml(self, path: str = None) -> None:
+        """save onto as RDF/XML without changing the editor's path, e.g., to
+        export the contents of a quadstore
 
+        :param path: path including filename, defaults to the editor's path
+        """
+        if self.journal and path in [None, self.path]:
+            self.compact()
+            return
+        self._save_to_file(path or self.path)
+
+    @_instrumented
+    def export_ntriples(self, path: str = None, compression: str = None) -> None:
+        """saves with same filename, but as ntriples
+
+        :param path: path including filename, defaults to the editor's path with
+            the extension .nt
+        :param compression: gzip, bz2, or xz, inferred from the path's extension
+            if not specified
+        """
+        self.write_ntriples(path or self.path.rsplit(".", 1)[0] + ".nt", compression)
+
+    def iter_ntriples(self) -> typing.Iterator[str]:
+        """stream the onto's triples from the quadstore as ntriples lines
+        without serializing the entire onto
+        NOTE: do not modify the onto while iterating
+
+        :return: generator of ntriples lines
+        """
+        unabbreviate = functools.lru_cache(maxsize=None)(self.onto_world._unabbreviate)
+        for s, p, o, d in self.onto.graph._iter_triples():
+            yield self._format_ntriple(
+                s, p, o, d, lambda storid: f"_:{-storid}", unabbreviate
+            )
+
+    @_instrumented
+    def write_ntriples(
+        self,
+        file: typing.Union[str, typing.BinaryIO],
+        compression: str = None,
+        chunk_size: int = 10000,
+    ) -> None:
+        """stream the onto as ntriples into a file or a file-like object, e.g.,
+        a pipe to another tool, optionally compressed
+
+        :param file: path or binary file-like object
+        :param compression: gzip, bz2, or xz, inferred from the extension of
+            paths if not specified
+        :param chunk_size: number of lines encoded and written at once
+        """
+        if compression is None and isinstance(file, str):
+            compression = _COMPRESSION_EXTENSIONS.get(file.rsplit(".", 1)[-1])
+        if compression not in [None, *_COMPRESSORS]:
+            raise ValueError(f"unsupported compression: {compression}")
+        with ExitStack() as stack:
+            if isinstance(file, str):
+                file = stack.enter_context(open(file, "wb"))
+            if compression:
+                file = stack.enter_context(_COMPRESSORS[compression](file, "wb"))
+            with self._lock:
+                lines = self.iter_ntriples()
+                while chunk := list(itertools.islice(lines, chunk_size)):
+                    data = "".join(chunk).encode("utf8")
+                    file.write(data)
+                    self._bytes_written += len(data)
+
+    @_instrumented
     def get_elems(self) -> list:
         """get classes, object properties, datatype properties, and instances
 
@@ -269,33 +1523,500 @@ class OntoEditor:
         :param body: body of the SPARQL query, without prefixes
         :return: complete SPARQL query consisting of prefixes and body
         """
-        gp = self.query_prefixes
-        sp = "PREFIX : <" + self.iri + "#>"
-        b = body
-        return gp + sp + "\n\n" + b
+        gp = self.query_prefixes
+        sp = "PREFIX : <" + self.iri + "#>"
+        b = body
+        return gp + sp + "\n\n" + b
+
+    @property
+    def revision(self) -> int:
+        """number of modifying method calls on this editor, e.g., to tell whether
+        results derived from the onto are outdated
+        NOTE: changes made directly via Owlready2 are not counted
+        """
+        return self._revision
+
+    def _rdflib_graph(self) -> tuple:
+        """get the rdflib graph view of the onto's world and the default
+        namespace bindings, cached until the next modification
+
+        :return: rdflib graph and dict of namespace bindings
+        """
+        if self._graph_cache is None or self._graph_cache[0] != (
+            self._revision,
+            self.onto_world,
+        ):
+            with self.onto:
+                graph = self.onto_world.as_rdflib_graph()
+            bindings = dict(
+                re.findall(r"^PREFIX\s+(\w*):\s*<([^>]*)>", self.query_prefixes, re.M)
+            )
+            bindings[""] = self.iri + "#"
+            self._graph_cache = ((self._revision, self.onto_world), graph, bindings)
+        return self._graph_cache[1:]
+
+    @_instrumented
+    def query_onto(
+        self,
+        query: str,
+        engine: str = "rdflib",
+        timeout: float = None,
+        max_rows: int = None,
+        cancel: threading.Event = None,
+    ) -> list:
+        """query onto using SPARQL; the default prefixes as well as : for the
+        onto's IRI are bound and may be omitted; the most recently used queries
+        are kept parsed for reuse
+        NOTE: Owlready2's own result conversion messes up ranges of dps, hence
+        results of the owlready engine are converted to rdflib terms instead;
+        the results' order may differ between engines since Owlready2 sorts
+        entities by their internal ids rather than their IRIs
+
+        :param query: SPARQL query
+        :param engine: rdflib or owlready; owlready compiles the query to SQL,
+            which is much faster, and falls back to rdflib for queries that
+            Owlready2 does not support
+        :param timeout: maximum evaluation time in seconds (optional)
+        :param max_rows: maximum number of result rows (optional)
+        :param cancel: event that cancels the evaluation when set (optional),
+            e.g., from another thread
+        :raises QueryLimitError: if a limit is exceeded or the query is cancelled
+        :return: query results as list
+        """
+        if engine not in ["rdflib", "owlready"]:
+            raise ValueError(f"unknown SPARQL engine: {engine}")
+        if timeout is None and max_rows is None and cancel is None:
+            compute = functools.partial(list, self._iter_query_rows(query, engine))
+        else:
+            compute = functools.partial(
+                self._query_limited, query, engine, timeout, max_rows, cancel
+            )
+        results = self._cached(("query", engine, _normalize_query(query)), compute)
+        # cached results may stem from queries without row limit
+        if max_rows is not None and len(results) > max_rows:
+            raise QueryLimitError(f"query returned more than {max_rows} rows")
+        return results
+
+    def _query_limited(
+        self,
+        query: str,
+        engine: str,
+        timeout: typing.Optional[float],
+        max_rows: typing.Optional[int],
+        cancel: typing.Optional[threading.Event],
+    ) -> list:
+        """evaluate a query and abort it once a limit is exceeded; the deadline
+        and cancel event are checked by an SQLite progress handler, which
+        interrupts both engines while they read from the quadstore, and
+        between result rows
+
+        :param query: SPARQL query
+        :param engine: rdflib or owlready
+        :param timeout: maximum evaluation time in seconds or None
+        :param max_rows: maximum number of result rows or None
+        :param cancel: event that cancels the evaluation when set or None
+        :return: query results as list
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def abort_reason() -> typing.Optional[str]:
+            if cancel is not None and cancel.is_set():
+                return "query cancelled"
+            if deadline is not None and time.monotonic() > deadline:
+                return f"query exceeded timeout of {timeout} s"
+            return None
+
+        results = []
+        db = self.onto_world.graph.db
+        # the handler applies to the entire connection, hence block other edits
+        with self._lock:
+            db.set_progress_handler(lambda: abort_reason() is not None, 1000)
+            try:
+                for row in self._iter_query_rows(query, engine):
+                    if reason := abort_reason():
+                        raise QueryLimitError(reason)
+                    if max_rows is not None and len(results) == max_rows:
+                        raise QueryLimitError(
+                            f"query returned more than {max_rows} rows"
+                        )
+                    results.append(row)
+            except sqlite3.OperationalError as err:
+                if reason := abort_reason():
+                    raise QueryLimitError(reason) from err
+                raise
+            finally:
+                db.set_progress_handler(None, 1000)
+        return results
+
+    def _cached(self, key: tuple, compute: typing.Callable) -> list:
+        """get results from the query cache or compute and cache them
+
+        :param key: cache key, unique for this editor
+        :param compute: function computing the results
+        :return: copy of the results
+        """
+        if self.query_cache is None:
+            return compute()
+        key = (self._cache_token, *key)
+        version = (self._revision, self.onto_world)
+        results = self.query_cache.get(key, version)
+        if results is None:
+            results = compute()
+            self.query_cache.put(key, version, results)
+        return [list(elem) if isinstance(elem, list) else elem for elem in results]
+
+    def iter_query(
+        self, query: str, engine: str = "rdflib", page_size: int = None
+    ) -> typing.Iterator:
+        """query onto using SPARQL like query_onto but yield the results lazily
+        instead of collecting them in a list first
+        NOTE: do not modify the onto while iterating
+
+        :param query: SPARQL query
+        :param engine: rdflib or owlready, see query_onto
+        :param page_size: evaluate the query in pages of at most page_size rows
+            using LIMIT and OFFSET, which bounds the memory required by queries
+            whose results are sorted or grouped; the query must not contain
+            LIMIT or OFFSET and should contain ORDER BY for a stable order
+        :return: generator of query results
+        """
+        if engine not in ["rdflib", "owlready"]:
+            raise ValueError(f"unknown SPARQL engine: {engine}")
+        if page_size is None:
+            return self._iter_query_rows(query, engine)
+        if page_size < 1:
+            raise ValueError(f"invalid page size: {page_size}")
+        if re.search(r"\b(LIMIT|OFFSET)\s+\d+", query, re.I):
+            raise ValueError("paged queries must not contain LIMIT or OFFSET")
+        return self._iter_query_pages(query, engine, page_size)
+
+    def iter_query_df(
+        self,
+        query: str,
+        engine: str = "rdflib",
+        chunk_size: int = 10000,
+        page_size: int = None,
+    ) -> typing.Iterator[pd.DataFrame]:
+        """query onto using SPARQL and yield the results as dataframes of at
+        most chunk_size rows with one column per selected variable; IRIs and
+        blank nodes are converted to strings, literals to Python values, and
+        unbound variables to None
+
+        :param query: SPARQL query
+        :param engine: rdflib or owlready, see query_onto
+        :param chunk_size: maximum number of rows per dataframe
+        :param page_size: optional page size, see iter_query
+        :return: generator of dataframes
+        """
+        rows = self.iter_query(query, engine, page_size)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            yield pd.DataFrame(
+                [[self._python_value(elem) for elem in row] for row in chunk],
+                columns=list(chunk[0].labels),
+            )
+
+    @staticmethod
+    def _python_value(term) -> typing.Any:
+        """convert an rdflib term to a value suitable for dataframes
+
+        :param term: rdflib term or None for unbound variables
+        :return: literal's Python value, IRI or blank node as string, or None
+        """
+        if term is None:
+            return None
+        if isinstance(term, Literal):
+            return term.toPython()
+        return str(term)
+
+    def _iter_query_rows(self, query: str, engine: str) -> typing.Iterator:
+        """evaluate a query lazily with the given engine, falling back to rdflib
+        only if the owlready engine raises, e.g., for unsupported queries
+
+        :param query: SPARQL query
+        :param engine: rdflib or owlready
+        :return: generator of query results
+        """
+        graph, bindings = self._rdflib_graph()
+        if engine == "owlready":
+            try:
+                rows = self._query_owlready(query, bindings)
+                first = next(rows, None)
+            except Exception as err:
+                self.logger.warning(
+                    f"query not supported by owlready, using rdflib: {err!r}"
+                )
+            else:
+                if first is not None:
+                    yield first
+                    yield from rows
+                return
+        yield from graph.query(_prepare_query(query, tuple(bindings.items())))
+
+    def _iter_query_pages(
+        self, query: str, engine: str, page_size: int
+    ) -> typing.Iterator:
+        """evaluate a query page by page, see iter_query
+
+        :param query: SPARQL query without LIMIT and OFFSET
+        :param engine: rdflib or owlready
+        :param page_size: maximum number of rows per page
+        :return: generator of query results
+        """
+        for offset in itertools.count(0, page_size):
+            page = list(
+                self._iter_query_rows(
+                    f"{query}\nLIMIT {page_size} OFFSET {offset}", engine
+                )
+            )
+            yield from page
+            if len(page) < page_size:
+                return
 
-    def query_onto(self, query: str) -> list:
-        """query onto using SPARQL
-        NOTE: use of query_owlready messes up ranges of dps
+    def _query_owlready(self, query: str, bindings: dict) -> typing.Iterator:
+        """evaluate a SELECT query with Owlready2's native SPARQL engine; the
+        query is compiled immediately, so unsupported queries raise before the
+        first row is requested
 
         :param query: SPARQL query
-        :return: query results as list
+        :param bindings: namespace bindings added unless declared in the query
+        :return: generator of query results as rdflib result rows, as returned
+            by rdflib
         """
-        with self.onto:
-            graph = self.onto_world.as_rdflib_graph()
-        return list(graph.query(query))
+        declared = set(re.findall(r"PREFIX\s+(\w*):", query, re.I))
+        prefixes = "".join(
+            f"PREFIX {prefix}: <{ns}>\n"
+            for prefix, ns in bindings.items()
+            if prefix not in declared
+        )
+        algebra = _prepare_query(query, tuple(bindings.items())).algebra
+        if optional_vars := _shared_optional_vars(algebra):
+            raise InfoException(optional_vars=optional_vars)
+        prepared = self.onto_world.prepare_sparql(prefixes + query)
+        if not isinstance(prepared, PreparedSelectQuery):
+            raise InfoException(query=query)
+        if "onto" in prepared.column_types:
+            raise InfoException(column_type="onto")
+        return self._iter_owlready_rows(prepared, _computed_vars(algebra))
+
+    def _iter_owlready_rows(
+        self, prepared: PreparedSelectQuery, computed: set
+    ) -> typing.Iterator[ResultRow]:
+        """convert the raw results of a prepared owlready query to rdflib rows
+
+        :param prepared: prepared SELECT query
+        :param computed: names of the variables whose values are computed
+        :return: generator of rdflib result rows
+        """
+        col_types = prepared.column_types
+        unabbreviate = functools.lru_cache(maxsize=None)(self.onto_world._unabbreviate)
+        labels = [Variable(name.lstrip("?")) for name in prepared.column_names]
+        for raw in prepared.execute_raw():
+            values, i = [], 0
+            while i < len(raw):
+                # entities take one column, other values a value and datatype
+                width = 1 if col_types[i] == "objs" else 2
+                o, d = raw[i], "o" if width == 1 else raw[i + 1]
+                if o is None:
+                    values.append(None)
+                elif d == "o":
+                    values.append(self._rdflib_term(o, unabbreviate))
+                else:
+                    # computed values may lose their type, e.g., 0.0 becomes 0,
+                    # whereas stored values are returned like by rdflib
+                    if (
+                        labels[len(values)] in computed
+                        and isinstance(o, int)
+                        and unabbreviate(d) in FLOAT_DATATYPES
+                    ):
+                        o = float(o)
+                    values.append(self._rdflib_literal(o, d, unabbreviate))
+                i += width
+            yield ResultRow(
+                {l: v for l, v in zip(labels, values) if v is not None}, labels
+            )
 
-    def get_axioms(self) -> list:
+    @_instrumented
+    def get_axioms(self, engine: str = "sparql") -> list:
         """identify all axioms included in the onto
 
+        :param engine: sparql to evaluate class_axioms.sparql or native to
+            traverse the quadstore directly, which yields the same rows but is
+            much faster for large TBoxes; op and dp axioms are always queried
+            via SPARQL
         :return: list of class, op, and dp axioms
         """
+        if engine not in ["sparql", "native"]:
+            raise ValueError(f"unknown axiom extraction engine: {engine}")
         axioms = []
         for body in ["class_axioms.sparql", "op_axioms.sparql", "dp_axioms.sparql"]:
-            query_ax = pkg_resources.read_text(queries, body)
+            if engine == "native" and body == "class_axioms.sparql":
+                axioms.append(
+                    self._cached(("class_axioms",), self._get_class_axioms_native)
+                )
+                continue
+            query_ax = _read_query(body)
             axioms.append(self.query_onto(self._build_query(query_ax)))
         return axioms
 
+    def _get_class_axioms_native(self) -> list:
+        """extract class axioms like class_axioms.sparql, i.e., axioms consisting
+        of a class, a restriction, or an intersection or union of these nested up
+        to two levels, by loading the relevant triples of the onto's world once
+        and traversing them in memory
+
+        :return: rows as returned by query_onto for class_axioms.sparql
+        """
+        graph = self.onto_world.graph
+        unabbreviate = functools.lru_cache(maxsize=None)(self.onto_world._unabbreviate)
+        structure = [
+            base.rdfs_subclassof,
+            base.owl_equivalentclass,
+            base.owl_disjointwith,
+            base.owl_onproperty,
+            base.owl_onclass,
+            base.SOME,
+            base.owl_ondatatype,
+            base.owl_withrestrictions,
+            base.owl_unionof,
+            base.owl_intersectionof,
+            base.rdf_first,
+            base.rdf_rest,
+        ]
+        limits = [
+            base.xmls_minexclusive,
+            base.xmls_mininclusive,
+            base.xmls_maxexclusive,
+            base.xmls_maxinclusive,
+        ]
+        objs: dict = {p: {} for p in structure + [base.rdf_type]}
+        for s, p, o in graph.execute(
+            f"SELECT s, p, o FROM objs WHERE p IN ({', '.join('?' * len(structure))})"
+            " OR (p = ? AND o IN (?, ?))",
+            (*structure, base.rdf_type, base.owl_class, base.owl_restriction),
+        ):
+            objs[p].setdefault(s, set()).add(o)
+        datas: dict = {p: {} for p in limits}
+        for s, p, o, d in graph.execute(
+            f"SELECT s, p, o, d FROM datas WHERE p IN ({', '.join('?' * len(limits))})",
+            limits,
+        ):
+            datas[p].setdefault(s, set()).add(self._rdflib_literal(o, d, unabbreviate))
+
+        def _values(p, nodes):
+            return {o for n in nodes for o in objs[p].get(n, ())}
+
+        def _is_combination(node):
+            return (
+                node in objs[base.owl_unionof] or node in objs[base.owl_intersectionof]
+            )
+
+        def _members(node):
+            lists = _values(base.owl_unionof, [node]) | _values(
+                base.owl_intersectionof, [node]
+            )
+            seen = set()
+            while lists - seen:
+                seen |= lists
+                lists |= _values(base.rdf_rest, lists)
+            return _values(base.rdf_first, lists)
+
+        def _axiom_parts(node):
+            """return (p, o, minex, minin, maxex, maxin) for a class or restriction"""
+            parts = []
+            node_types = objs[base.rdf_type].get(node, ())
+            if base.owl_class in node_types:
+                parts.append((None, node, None, None, None, None))
+            if base.owl_restriction not in node_types:
+                return parts
+            some = _values(base.SOME, [node])
+            datatypes = _values(base.owl_ondatatype, some)
+            facets = _values(base.owl_withrestrictions, some)
+            firsts = _values(base.rdf_first, facets)
+            seconds = _values(base.rdf_first, _values(base.rdf_rest, facets))
+            bounds = [
+                {v for n in nodes for v in datas[limit].get(n, ())} or {None}
+                for limit, nodes in zip(limits, [firsts, firsts, seconds, seconds])
+            ]
+            for prop in objs[base.owl_onproperty].get(node, ()):
+                for o in _values(base.owl_onclass, [node]) | {
+                    o for o in some if o not in objs[base.owl_ondatatype]
+                }:
+                    parts.append((prop, o, None, None, None, None))
+                for o in datatypes:
+                    parts += [(prop, o, *b) for b in itertools.product(*bounds)]
+            return parts
+
+        rows = {}
+        for rel in [
+            base.owl_equivalentclass,
+            base.rdfs_subclassof,
+            base.owl_disjointwith,
+        ]:
+            for cls, eqs in objs[rel].items():
+                if _is_combination(cls) or base.owl_restriction in objs[
+                    base.rdf_type
+                ].get(cls, ()):
+                    continue
+                for eq in eqs:
+                    if not _is_combination(eq):
+                        parts = _axiom_parts(eq)
+                    else:
+                        parts = []
+                        for lvl1 in _members(eq):
+                            nodes = _members(lvl1) if _is_combination(lvl1) else [lvl1]
+                            for node in nodes:
+                                if not _is_combination(node):
+                                    parts += _axiom_parts(node) or [(None,) * 6]
+                    for p, o, *bounds in parts:
+                        row = [cls, eq, rel, p, o]
+                        row = [
+                            None if v is None else self._rdflib_term(v, unabbreviate)
+                            for v in row
+                        ]
+                        rows[tuple(row + bounds)] = None
+
+        def _order(row):
+            # corresponds to ORDER BY ?class ?eq ?p ?o with unbound values first
+            return [
+                (0, "") if v is None else (isinstance(v, URIRef) + 1, str(v))
+                for v in [row[0], row[1], row[3], row[4]]
+            ]
+
+        labels = [
+            Variable(v) for v in "class eq rel p o minex minin maxex maxin".split()
+        ]
+        return [
+            ResultRow(
+                {label: v for label, v in zip(labels, row) if v is not None}, labels
+            )
+            for row in sorted(rows, key=_order)
+        ]
+
+    @staticmethod
+    def _rdflib_term(storid: int, unabbreviate: typing.Callable):
+        """
+        :param storid: storid of an entity or blank node
+        :param unabbreviate: function that returns the iri for a storid
+        :return: rdflib term as returned by queries via the rdflib graph view
+        """
+        if storid < 0:
+            return BNode(-storid)
+        return URIRef(unabbreviate(storid))
+
+    @staticmethod
+    def _rdflib_literal(o, d, unabbreviate: typing.Callable) -> Literal:
+        """
+        :param o: literal value from the quadstore
+        :param d: literal's datatype storid or language tag
+        :param unabbreviate: function that returns the iri for a storid
+        :return: rdflib literal as returned by queries via the rdflib graph view
+        """
+        if isinstance(d, str) and d.startswith("@"):
+            return Literal(o, lang=d[1:])
+        if d in ["", 0]:
+            return Literal(o)
+        return Literal(o, datatype=URIRef(unabbreviate(d)))
+
     def _create_notion(self, name, parent, elem_type) -> type:
         """load a notion from the ontology or create a new one if not yet available
         works for classes, object properties, and data properties
@@ -328,19 +2049,100 @@ class OntoEditor:
                 raise InfoException
         return notion
 
-    def add_taxo(self, class_tuples: list) -> None:
-        """add taxonomy to onto
+    @_mutator
+    def add_taxo(self, class_tuples: typing.Union[typing.Iterable, dict]) -> None:
+        """add taxonomy to onto; tuples may be in any order since they are sorted
+        topologically, classes in cycles or with missing superclasses are skipped
+        NOTE: new classes are inserted directly into the quadstore, existing
+        ones are extended via Owlready2
 
-        :param class_tuples: list of 2-tuples of the form [class, superclass]
+        :param class_tuples: iterable of 2-tuples of the form [class, superclass]
+            or dict of the form {superclass: [subclasses]}
         """
-        with self.onto:
-            for clst in class_tuples:
-                try:
-                    my_class = self._create_notion(clst[0], clst[1], "c")
-                except (TypeError, InfoException):
-                    self.logger.warning(f"unexpected class info: {clst}")
-                    continue
-        self.onto.save(file=self.path)
+        if isinstance(class_tuples, dict):
+            class_tuples = self.class_dict_to_tuple_list(class_tuples)
+        world, c = self.onto_world, self.onto.graph.c
+        storids: dict = {None: base.owl_thing}
+        triples: list = []
+
+        def _insert_triples():
+            world.graph.db.executemany(
+                "INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", triples
+            )
+            triples.clear()
+
+        for name, parents in self._sort_taxo(class_tuples):
+            missing = [p for p in parents if not self._taxo_storid(p, storids)]
+            if missing:
+                self.logger.warning(f"missing superclasses {missing} for: {name}")
+                continue
+            if self.onto[name] is not None:
+                _insert_triples()
+                with self.onto:
+                    for parent in parents:
+                        try:
+                            my_class = self._create_notion(name, parent, "c")
+                        except (TypeError, InfoException):
+                            self.logger.warning(
+                                f"unexpected class info: {[name, parent]}"
+                            )
+                storids[name] = self.onto[name].storid
+                continue
+            storids[name] = world._abbreviate(self.onto.base_iri + name)
+            triples.append((c, storids[name], base.rdf_type, base.owl_class))
+            triples += [
+                (c, storids[name], base.rdfs_subclassof, storids[p]) for p in parents
+            ]
+        _insert_triples()
+        self._save()
+
+    def _sort_taxo(self, class_tuples: typing.Iterable) -> list:
+        """sort class tuples topologically and group them by class
+
+        :param class_tuples: iterable of 2-tuples of the form [class, superclass]
+        :return: list of tuples of the form (class, [superclasses]) such that
+            superclasses precede their subclasses; classes in cycles are omitted
+        """
+        parents: dict = {}
+        for clst in class_tuples:
+            try:
+                # empty superclasses, e.g., from CSV files, denote owl:Thing
+                name, parent = clst[0], clst[1] or None
+            except (TypeError, IndexError):
+                name = None
+            if not name:
+                self.logger.warning(f"unexpected class info: {clst}")
+                continue
+            if parent not in parents.setdefault(name, []):
+                parents[name].append(parent)
+        children: dict = {name: [] for name in parents}
+        pending = {}
+        for name, supers in parents.items():
+            internal = {p for p in supers if p in parents and p != name}
+            pending[name] = len(internal) + (name in supers)
+            for parent in internal:
+                children[parent].append(name)
+        queue = [name for name, count in pending.items() if not count]
+        for name in queue:
+            for child in children[name]:
+                pending[child] -= 1
+                if not pending[child]:
+                    queue.append(child)
+        if len(queue) < len(parents):
+            cyclic = [name for name in parents if pending[name]]
+            self.logger.warning(f"cyclic class hierarchy, skipped: {cyclic}")
+        return [(name, parents[name]) for name in queue]
+
+    def _taxo_storid(self, name: typing.Optional[str], storids: dict) -> int:
+        """
+        :param name: name of a class, None for owl:Thing
+        :param storids: cache mapping class names to storids, updated in place
+        :return: storid of the class, None if no such class exists
+        """
+        if name not in storids:
+            cls = self.onto[name]
+            storids[name] = cls.storid if isinstance(cls, ThingClass) else None
+        return storids[name]
 
     @staticmethod
     def class_dict_to_tuple_list(cls_dict: dict) -> list:
@@ -407,12 +2209,13 @@ class OntoEditor:
             comb = Or(res)
         return comb, res_type, cls
 
-    def add_axioms(self, axioms: list) -> None:
+    @_mutator
+    def add_axioms(self, axioms: typing.Iterable) -> None:
         """add entire axioms to onto
         NOTE: only one axiom may be specified at once
         NOTE: no error handling implemented for input tuples
 
-        :param axioms: list of tuples of the form [class, superclass, property,
+        :param axioms: iterable of tuples of the form [class, superclass, property,
             inverted(bool), cardinality type, cardinality, op-object, dp-range,
             dp-min-ex, dp-min-in, dp-exact, dp-max-in, dp-max-ex, negated(bool),
             equivalence(bool)]
@@ -461,7 +2264,7 @@ class OntoEditor:
                         current_axioms.append(comb)
                     else:
                         self.logger.warning(f"unexpected input: {axiom}")
-        self.onto.save(file=self.path)
+        self._save()
 
     def _tuple_to_res(
         self, supercls: str, resinfo: list, opinfo: list, dpinfo: list, axiom: list
@@ -603,6 +2406,7 @@ class OntoEditor:
     def _check_value_validity(value) -> bool:
         return value is not None and value != ""
 
+    @_mutator
     def add_gcas(self, gcas: list) -> None:
         """workaround for representing General Class Axioms
         adds two helper classes, each defined via an axiom, that are defined to be equivalent
@@ -632,13 +2436,14 @@ class OntoEditor:
                     a[1] = None
                 gca.append([gca[0][0], gca[1][0]] + [None] * 12 + [True])
                 self.add_axioms(gca)
-        self.onto.save(file=self.path)
+        self._save()
 
-    def add_ops(self, op_tuples: list) -> None:
+    @_mutator
+    def add_ops(self, op_tuples: typing.Iterable) -> None:
         """add object properties including their axioms to onto
         NOTE: only one inverse_prop can be processed per tuple
 
-        :param op_tuples: list of tuples of the form [op, super-op, domain, range,
+        :param op_tuples: iterable of tuples of the form [op, super-op, domain, range,
             functional, inverse functional, transitive, symmetric,
             asymmetric, reflexive, irreflexive, inverse_prop]
         """
@@ -658,12 +2463,13 @@ class OntoEditor:
                         my_op.is_a.append(self._prop_types[count])
                 if op[-1]:
                     my_op.inverse_property = self.onto[op[11]]
-        self.onto.save(file=self.path)
+        self._save()
 
-    def add_dps(self, dp_tuples: list) -> None:
+    @_mutator
+    def add_dps(self, dp_tuples: typing.Iterable) -> None:
         """add datatype properties including their axioms to onto
 
-        :param dp_tuples: list of input tuples of the form [dp, super-dp, functional,
+        :param dp_tuples: iterable of input tuples of the form [dp, super-dp, functional,
             domain, range, minex, minin, exact, maxin, maxex]
         """
         with self.onto:
@@ -687,12 +2493,13 @@ class OntoEditor:
                     else:
                         self.logger.warning(f"unexpected dp range: {dp}")
                         continue
-        self.onto.save(file=self.path)
+        self._save()
 
-    def add_instances(self, instance_tuples: list) -> None:
+    @_mutator
+    def add_instances(self, instance_tuples: typing.Iterable) -> None:
         """add instances and their relations to onto
 
-        :param instance_tuples: list of tuples of the form [instance, class,
+        :param instance_tuples: iterable of tuples of the form [instance, class,
             property, range, range-type]
         """
         with self.onto:
@@ -720,7 +2527,122 @@ class OntoEditor:
                     self._add_instance_relation(my_instance, pred, val)
                 else:
                     self.logger.warning(f"unexpected triple: {inst}")
-        self.onto.save(file=self.path)
+        self._save()
+
+    @_mutator
+    def add_instances_bulk(
+        self, instance_tuples: typing.Iterable, batch_size: int = 10000
+    ) -> None:
+        """add instances and their relations like add_instances(), but insert
+        their triples directly into the quadstore in batches
+        NOTE: tuples concerning entities already loaded as Python objects are
+        passed on to add_instances() so that these objects stay up to date
+        NOTE: no in-memory rollback snapshot is taken, the onto is reloaded
+        from its last saved state if an error occurs
+
+        :param instance_tuples: iterable of tuples of the form [instance, class,
+            property, range, range-type]
+        :param batch_size: number of tuples inserted at once
+        """
+        tuples = iter(instance_tuples)
+        entities: dict = {}
+        with self.edit_session(snapshot=False):
+            while batch := list(itertools.islice(tuples, batch_size)):
+                fallback = self._insert_instance_batch(batch, entities)
+                if fallback:
+                    self.add_instances(fallback)
+            # the batches bypass _save(), so mark the session to be saved on commit
+            self._dirty = True
+
+    def _insert_instance_batch(self, batch: list, entities: dict) -> list:
+        """
+        :param batch: list of instance tuples as defined by add_instances()
+        :param entities: cache mapping names to classes or properties and
+            properties to their kind and functional status, updated in place
+        :return: tuples that concern entities already loaded as Python objects,
+            i.e., their subject or the object of an inverse relation
+        """
+        world, c = self.onto_world, self.onto.graph.c
+        objs, datas, functional, fallback = [], [], {}, []
+
+        def _entity(name):
+            if name not in entities:
+                entities[name] = self.onto[name]
+            return entities[name]
+
+        def _prop_info(pred):
+            if pred not in entities:
+                entities[pred] = (
+                    DataProperty in pred.is_a,
+                    ObjectProperty in pred.is_a,
+                    FunctionalProperty in pred.is_a,
+                    pred.inverse_property is not None,
+                )
+            return entities[pred]
+
+        @functools.lru_cache(maxsize=None)
+        def _storid(name, create_if_missing=True):
+            return world._abbreviate(self.onto.base_iri + name, create_if_missing)
+
+        for inst in batch:
+            cls = _entity(inst[1]) if inst[0] and inst[1] else None
+            if not isinstance(cls, ThingClass):
+                self.logger.warning(f"unexpected instance info: {inst}")
+                continue
+            subj = _storid(inst[0])
+            if subj in world._entities:
+                fallback.append(inst)
+                continue
+            objs += [
+                (c, subj, base.rdf_type, base.owl_named_individual),
+                (c, subj, base.rdf_type, cls.storid),
+            ]
+            if not any(inst[2:]):
+                continue
+            pred = _entity(inst[2]) if inst[2] else None
+            if pred is None or not self._check_value_validity(inst[3]):
+                self.logger.warning(f"unexpected triple: {inst}")
+                continue
+            is_dp, is_op, is_functional, has_inverse = _prop_info(pred)
+            if is_dp and inst[4] and inst[4] not in self._dp_range_types:
+                self.logger.warning(f"unexpected DP range: {inst}")
+                continue
+            elif is_dp:
+                if inst[4]:
+                    val = self._transform_to_dp_type(inst[4], inst[3])
+                else:
+                    self.logger.warning(
+                        f"DP range undefined - defaulting to string: {inst}"
+                    )
+                    val = inst[3]
+                triple = (datas, (c, subj, pred.storid, *base.to_literal(val)))
+            elif is_op and not inst[4]:
+                obj = _storid(inst[3], False)
+                if obj is None:
+                    self.logger.warning(f"unexpected triple: {inst}")
+                    continue
+                if has_inverse and obj in world._entities:
+                    fallback.append(inst)
+                    continue
+                triple = (objs, (c, subj, pred.storid, obj))
+            else:
+                self.logger.warning(f"unexpected triple: {inst}")
+                continue
+            if is_functional:
+                # only the last value per functional property is kept
+                functional[(c, subj, pred.storid)] = triple
+            else:
+                triple[0].append(triple[1])
+        for table, row in functional.values():
+            table.append(row)
+        db = world.graph.db
+        for table in ["objs", "datas"]:
+            db.executemany(
+                f"DELETE FROM {table} WHERE c=? AND s=? AND p=?", list(functional)
+            )
+        db.executemany("INSERT OR IGNORE INTO objs VALUES (?, ?, ?, ?)", objs)
+        db.executemany("INSERT OR IGNORE INTO datas VALUES (?, ?, ?, ?, ?)", datas)
+        return fallback
 
     @staticmethod
     def _add_instance_relation(subj, pred, obj) -> None:
@@ -729,11 +2651,12 @@ class OntoEditor:
         else:
             getattr(subj, pred.name).append(obj)
 
-    def add_distinctions(self, distinct_sets: list) -> None:
+    @_mutator
+    def add_distinctions(self, distinct_sets: typing.Iterable) -> None:
         """make classes disjoint and instances distinct
         NOTE: distinctions may lead to inconsistencies reasoners cannot handle
 
-        :param distinct_sets: list of lists with disjoint/ different elements
+        :param distinct_sets: iterable of lists with disjoint/ different elements
         """
         funcs = {"classes": AllDisjoint, "instances": AllDifferent}
         with self.onto:
@@ -743,8 +2666,32 @@ class OntoEditor:
                     func([self.onto[elem] for elem in ds[1]])
                 except KeyError:
                     self.logger.warning(f"unknown distinction type {ds[0]}")
-        self.onto.save(file=self.path)
-
+        self._save()
+
+    @_mutator
+    def add_chunked(
+        self, add_func: typing.Callable, chunks: typing.Iterable[list]
+    ) -> int:
+        """feed chunks of input tuples, e.g., from iter_csv() or iter_json(), to
+        one of the add_* functions within one edit session so that large inputs
+        are processed with bounded memory and the onto is saved only once
+        NOTE: no in-memory rollback snapshot is taken, the onto is reloaded
+        from its last saved state if an error occurs, i.e., none of the chunks
+        are kept
+
+        :param add_func: add_* function of this editor, e.g., editor.add_instances
+        :param chunks: iterable of lists of input tuples
+        :return: number of input tuples processed
+        """
+        count = 0
+        with self.edit_session(snapshot=False):
+            for chunk in chunks:
+                add_func(chunk)
+                count += len(chunk)
+                self.logger.info(f"processed {count} input tuples")
+        return count
+
+    @_mutator
     def remove_elements(self, elem_list: list) -> None:
         """remove elements, all their descendents and (in case of classes) instances,
         and all references from axioms
@@ -760,8 +2707,9 @@ class OntoEditor:
                     if desc != self.onto[elem]:
                         destroy_entity(desc)
                 destroy_entity(self.onto[elem])
-        self.onto.save(file=self.path)
+        self._save()
 
+    @_mutator
     def add_label(self, name: str, label: str, lang: str = None) -> None:
         """add label in language specified as localized string, defaults to
         regular string if no language is specified
@@ -775,7 +2723,12 @@ class OntoEditor:
             return
         desc = entity.label
         self._add_description_generic(desc, label, lang)
+        if self._label_index and self._label_index[0] == self._revision:
+            self._index_label(*self._label_index[1:], entity.iri, label, lang)
+            # the index stays valid for the revision bumped by _mutator
+            self._label_index = (self._revision + 1, *self._label_index[1:])
 
+    @_mutator
     def add_annotation(self, name: str, comment: str, lang: str = None) -> None:
         """add annotation in language specified as localized string, defaults to
         regular string if no language is specified
@@ -790,6 +2743,86 @@ class OntoEditor:
         desc = entity.comment
         self._add_description_generic(desc, comment, lang)
 
+    def get_labels(self, name: str, lang: str = None) -> list:
+        """get an entity's labels from the label index
+
+        :param name: entity name
+        :param lang: only return labels in the language specified (optional)
+        :return: labels as localized strings or, if no language is specified
+            for a label, as regular strings
+        """
+        by_iri, _ = self._labels()
+        return [
+            locstr(l, lang=l_lang) if l_lang else l
+            for l, l_lang in by_iri.get(self.onto.base_iri + name, [])
+            if not lang or l_lang == lang
+        ]
+
+    def find_by_label(self, label: str, lang: str = None, exact: bool = True) -> list:
+        """find entities by label using the label index
+
+        :param label: label to search for
+        :param lang: only consider labels in the language specified (optional)
+        :param exact: match labels exactly, otherwise as case-insensitive
+            substrings
+        :return: IRIs of matching entities
+        """
+        _, by_label = self._labels()
+        if exact:
+            candidates = by_label.get(label, [])
+        else:
+            label = label.casefold()
+            candidates = [
+                entry
+                for key, entries in by_label.items()
+                if label in key.casefold()
+                for entry in entries
+            ]
+        return list(
+            dict.fromkeys(
+                iri for iri, l_lang in candidates if not lang or l_lang == lang
+            )
+        )
+
+    def _labels(self) -> tuple:
+        """get the label index of the onto's world, which is built by reading all
+        labels from the quadstore at once and rebuilt after modifications other
+        than add_label
+
+        :return: dicts mapping IRIs to lists of (label, lang) tuples in the order
+            of the entities' label lists and labels to lists of (IRI, lang) tuples
+        """
+        if self._label_index is None or self._label_index[0] != self._revision:
+            by_iri: dict = {}
+            by_label: dict = {}
+            world = self.onto_world
+            label_storid = world._abbreviate(_RDFS_LABEL, False)
+            rows = world.graph.execute(
+                "SELECT s, o, d FROM datas WHERE p = ? ORDER BY rowid",
+                (label_storid,),
+            )
+            for s, o, d in rows:
+                # skip labels of blank nodes
+                if s < 0:
+                    continue
+                lang = d[1:] if isinstance(d, str) and d.startswith("@") else None
+                self._index_label(
+                    by_iri, by_label, world._unabbreviate(s), str(o), lang
+                )
+            self._label_index = (self._revision, by_iri, by_label)
+        return self._label_index[1:]
+
+    @staticmethod
+    def _index_label(
+        by_iri: dict, by_label: dict, iri: str, label: str, lang: typing.Optional[str]
+    ) -> None:
+        """add a label to the label index unless it is already included"""
+        entry = (str(label), lang or None)
+        if entry in by_iri.setdefault(iri, []):
+            return
+        by_iri[iri].append(entry)
+        by_label.setdefault(entry[0], []).append((iri, entry[1]))
+
     def _get_entity_by_name(self, name: str) -> typing.Optional[Thing]:
         entity = None
         try:
@@ -814,8 +2847,9 @@ class OntoEditor:
             desc_list.append(locstr(description, lang=lang))
         else:
             desc_list.append(description)
-        self.onto.save(file=self.path)
+        self._save()
 
+    @_mutator
     def remove_from_taxo(self, elem_list: list, reassign: bool = True) -> None:
         """remove a class from the taxonomy, but keep all subclasses and instances
         by relating them to parent
@@ -849,8 +2883,9 @@ class OntoEditor:
                 for ind in individuals:
                     ind.is_a.append(parent[0])
                 destroy_entity(self.onto[elem])
-        self.onto.save(file=self.path)
+        self._save()
 
+    @_instrumented
     def get_class_restrictions(
         self, class_name: str, res_type: str = "is_a", res_only: bool = True
     ) -> list:
@@ -874,6 +2909,7 @@ class OntoEditor:
                 elems = [x for x in elems if isinstance(x, Restriction)]
         return elems
 
+    @_mutator
     def remove_restrictions_on_class(self, class_name: str) -> None:
         """remove all restrictions on a given class
 
@@ -882,8 +2918,9 @@ class OntoEditor:
         with self.onto:
             for lst in self.onto[class_name].is_a, self.onto[class_name].equivalent_to:
                 self._remove_restr_from_class_def(lst)
-        self.onto.save(file=self.path)
+        self._save()
 
+    @_mutator
     def remove_restrictions_including_prop(self, prop_name: str) -> None:
         """remove class restrictions that include a certain property
 
@@ -894,7 +2931,7 @@ class OntoEditor:
             for c in self.onto.classes():
                 for lst in c.is_a, c.equivalent_to:
                     self._remove_restr_from_class_def(lst, self.onto[prop_name])
-        self.onto.save(file=self.path)
+        self._save()
 
     @staticmethod
     def _remove_restr_from_class_def(cls_restrictions, prop=None) -> None:
@@ -907,6 +2944,7 @@ class OntoEditor:
             if not prop or prop and r.property == prop:
                 cls_restrictions.remove(r)
 
+    @_mutator
     def reasoning(
         self, reasoner: str = "hermit", save: bool = False, debug: bool = False
     ) -> list:
@@ -919,10 +2957,9 @@ class OntoEditor:
         :return: returns list of inconsistent classes if there are any
         """
         inconsistent_classes = []
-        # add temporary world for inferences
-        inferences = World()
         self._check_reasoner(reasoner)
-        inf_onto = inferences.get_ontology(self.path).load()
+        # add temporary world for inferences
+        inf_onto = self._load_copy()
         with inf_onto:
             try:
                 with self._redirect_to_log():
@@ -947,8 +2984,10 @@ class OntoEditor:
             if Nothing in inconsistent_classes:
                 inconsistent_classes.remove(Nothing)
         elif save and not inconsistent_classes:
-            inf_onto.save(file=self.path)
-            self._reload_from_file()
+            self._reload_from_bytes(self._serialize(inf_onto))
+            if self.journal:
+                self._journal_compaction_pending = True
+            self._save()
         return inconsistent_classes
 
     def _check_reasoner(self, reasoner: str) -> None:
@@ -998,6 +3037,7 @@ class OntoEditor:
             axioms = [[axiom.split() for axiom in block] for block in expls]
         return (res, axioms)
 
+    @_mutator
     def debug_onto(
         self, reasoner: str = "hermit", assume_correct_taxo: bool = True
     ) -> None:
@@ -1015,8 +3055,7 @@ class OntoEditor:
         elif inconsistent_classes:
             print(f"Inconsistent classes are: {inconsistent_classes}")
             if self._bool_user_interaction("Show further information?"):
-                debug = World()
-                debug_onto = debug.get_ontology(self.path).load()
+                debug_onto = self._load_copy()
                 with debug_onto:
                     try:
                         sync_reasoner_pellet(
@@ -1052,7 +3091,7 @@ class OntoEditor:
                 self._interactively_delete_axs_by_rel(
                     rel, inconsistent_classes, pot_probl_ax, ax_msg
                 )
-            self.onto.save(file=self.path)
+            self._save()
             self.debug_onto(reasoner, assume_correct_taxo)
 
     def _get_incon_class_res(self, restype: str, inconsistent_classes: list) -> list:
@@ -1104,60 +3143,269 @@ class OntoEditor:
             return answer[user_input]
 
     @staticmethod
-    def _remove_nt_brackets(triple: list) -> list:
-        for c, _ in enumerate(triple):
-            triple[c] = triple[c].replace("<", "")
-            triple[c] = triple[c].replace(">", "")
-        return triple
-
-    @staticmethod
-    def _df_to_nx_incl_labels(df: pd.DataFrame, coloring: dict) -> nx.MultiDiGraph:
+    def _df_to_nx_incl_labels(
+        df: pd.DataFrame, coloring: dict, categories: dict
+    ) -> nx.MultiDiGraph:
         """turns a pandas dataframe into a networkx graph
 
-        :param df: pandas df with spo-triples
-        :param coloring: dict with colors as keys and lists of nodes as values
+        :param df: pandas df with spo-triples and a column indicating whether
+            objects are literals
+        :param coloring: dict with node categories as keys and colors as values
+        :param categories: dict with nodes as keys and their categories as values
         :return: nxgraph for the ontology including labels and coloring
         """
         nxgraph = nx.from_pandas_edgelist(
             df,
             source="subject",
             target="object",
-            edge_attr="predicate",
+            edge_attr=["predicate", "weight"] if "weight" in df else "predicate",
             create_using=nx.MultiDiGraph(),
         )
         # manually set predicates as labels
         for e in nxgraph.edges.items():
             e[1]["label"] = e[1].pop("predicate")
-        # assert that a node may not have more than one color
-        assert not set(list(coloring.values())[0]).intersection(
-            *list(coloring.values())
-        ), "Several colors specified for one node"
-        for n in nxgraph.nodes.items():
-            for color in coloring.keys():
-                if n[0] in coloring[color]:
-                    n[1]["color"] = color
+            if "weight" in e[1]:
+                e[1]["weight"] = int(e[1]["weight"])
+                e[1]["value"] = e[1]["weight"]
+                e[1]["title"] = str(e[1]["weight"])
+        colors = {
+            n: coloring[categories[n]]
+            for n in nxgraph.nodes
+            if categories.get(n) in coloring
+        }
+        if "literal" in coloring:
+            colors.update(
+                dict.fromkeys(df["object"][df["literal"]], coloring["literal"])
+            )
+        nx.set_node_attributes(nxgraph, colors, "color")
         return nxgraph
 
+    @_instrumented
     def _ntriples_to_df(self) -> pd.DataFrame:
-        self.export_ntriples()
-        with open(self.path.rsplit(".", 1)[0] + ".nt", "r") as f:
-            lines = f.readlines()
-        df = pd.DataFrame(columns=["subject", "predicate", "object"])
-        for rownum, row in enumerate(lines):
-            df.loc[rownum] = self._remove_nt_brackets(
-                row.rsplit(".", 1)[0].split(" ")[:3]
-            )
-        return df
+        """read the onto's triples from the quadstore into a dataframe in column
+        form; entities are named like in query results, i.e., by the part of
+        their IRI after the last #, blank nodes like in ntriples, and literals
+        by their values
+
+        :return: df with spo-triples
+        """
+        triples = pd.DataFrame(
+            self.onto.graph._iter_triples().fetchall(),
+            columns=["s", "p", "o", "d"],
+            dtype=object,
+        )
+        is_entity = triples["d"].isna()
+        storids = pd.unique(
+            pd.concat([triples["s"], triples["p"], triples["o"][is_entity]])
+        )
+        unabbreviate = self.onto_world._unabbreviate
+        names = pd.Series(
+            [unabbreviate(s) if s > 0 else "" for s in storids], dtype=object
+        )
+        names = names.str.rsplit("#", n=1).str[-1]
+        blank = storids < 0
+        names[blank] = [f"_:{-s}" for s in storids[blank]]
+        lookup = dict(zip(storids, names))
+        objects = triples["o"].astype(str)
+        objects[is_entity] = triples["o"][is_entity].map(lookup)
+        return pd.DataFrame(
+            {
+                "subject": triples["s"].map(lookup),
+                "predicate": triples["p"].map(lookup),
+                "object": objects,
+                "literal": ~is_entity,
+            }
+        )
 
     @staticmethod
     def _query_results_to_df(query_results: list) -> pd.DataFrame:
         clean_data = [
-            [str(elem).rsplit("#", maxsplit=1)[-1] for elem in row]
+            [
+                f"_:{elem}"
+                if isinstance(elem, BNode)
+                else str(elem).rsplit("#", maxsplit=1)[-1]
+                for elem in row
+            ]
+            + [isinstance(row[2], Literal)]
             for row in query_results
         ]
-        df = pd.DataFrame(clean_data, columns=["subject", "predicate", "object"])
+        df = pd.DataFrame(
+            clean_data, columns=["subject", "predicate", "object", "literal"]
+        )
         return df
 
+    def _node_categories(self) -> dict:
+        """get the categories of the onto's entities and restrictions, cached
+        until the next modification
+
+        :return: dict with nodes named like in the visualization's dataframes as
+            keys and class, instance, object_property, data_property, or
+            restriction as values; entities of several types, e.g., punned ones,
+            are assigned the first of these categories
+        """
+        if self._category_cache is None or self._category_cache[0] != (
+            self._revision,
+            self.onto_world,
+        ):
+            unabbreviate = self.onto_world._unabbreviate
+            categories: dict = {}
+            for category, storid in _NODE_CATEGORIES.items():
+                subjects = self.onto_world.graph.execute(
+                    "SELECT s FROM objs WHERE c = ? AND p = ? AND o = ?",
+                    (self.onto.graph.c, base.rdf_type, storid),
+                )
+                for (s,) in subjects:
+                    if s < 0 and category == "restriction":
+                        categories.setdefault(f"_:{-s}", category)
+                    elif s > 0:
+                        name = unabbreviate(s).rsplit("#", maxsplit=1)[-1]
+                        categories.setdefault(name, category)
+            self._category_cache = ((self._revision, self.onto_world), categories)
+        return self._category_cache[1]
+
+    def _class_hierarchy(self) -> tuple:
+        """get the onto's named class hierarchy and the classes of its instances,
+        cached until the next modification
+
+        :return: dicts mapping classes to their first named superclass and
+            instances to their first named class, named like in the
+            visualization's dataframes
+        """
+        if self._hierarchy_cache is None or self._hierarchy_cache[0] != (
+            self._revision,
+            self.onto_world,
+        ):
+            categories = self._node_categories()
+            graph = self.onto_world.graph
+            classes = {
+                o: self.onto_world._unabbreviate(o).rsplit("#", maxsplit=1)[-1]
+                for (o,) in graph.execute(
+                    "SELECT s FROM objs WHERE c = ? AND p = ? AND o = ?",
+                    (self.onto.graph.c, base.rdf_type, base.owl_class),
+                )
+                if o > 0
+            }
+            relations: dict = {"class": {}, "instance": {}}
+            for p in [base.rdfs_subclassof, base.rdf_type]:
+                # resolve subjects' IRIs in SQL, there may be millions of them
+                pairs = graph.execute(
+                    "SELECT r.iri, objs.o FROM objs JOIN resources r "
+                    "ON r.storid = objs.s WHERE objs.c = ? AND objs.p = ? "
+                    "ORDER BY objs.rowid",
+                    (self.onto.graph.c, p),
+                )
+                for iri, o in pairs:
+                    sub = iri.rsplit("#", maxsplit=1)[-1]
+                    if o in classes and sub != classes[o]:
+                        sup = classes[o]
+                        relations.get(categories.get(sub), {}).setdefault(sub, sup)
+            self._hierarchy_cache = (
+                (self._revision, self.onto_world),
+                relations["class"],
+                relations["instance"],
+            )
+        return self._hierarchy_cache[1:]
+
+    def _aggregate_df(
+        self,
+        df: pd.DataFrame,
+        depth: int = None,
+        bylabel: bool = False,
+        lang: str = None,
+    ) -> tuple:
+        """collapse the instances of each class into a single node, as well as
+        their literals per property; collapse class subtrees
+        beyond a depth into their ancestors; relations between the resulting
+        nodes are merged and weighted by their number
+
+        :param df: pandas df with spo-triples and a column indicating whether
+            objects are literals
+        :param depth: depth in the class hierarchy beyond which classes are
+            collapsed into their ancestors, where top level classes have depth 0
+            (optional)
+        :param bylabel: name aggregate nodes by label (if available)
+        :param lang: language of the labels
+        :return: df with spo-triples, literal flags, and weights, and dict with
+            aggregate nodes as keys and dicts with their category, label, and
+            size as values
+        """
+        categories = self._node_categories()
+        parents, instance_classes = self._class_hierarchy()
+
+        def representative(cls: str) -> str:
+            chain = [cls]
+            while chain[-1] in parents and parents[chain[-1]] not in chain:
+                chain.append(parents[chain[-1]])
+            if depth is None or len(chain) <= depth + 1:
+                return cls
+            return chain[-depth - 1]
+
+        def name(n: str) -> str:
+            return self._name_to_label(n, lang) if bylabel else n
+
+        # node ids of aggregates contain spaces, which entity names cannot
+        mapping: dict = {}
+        nodes: dict = {}
+        entities = pd.unique(pd.concat([df["subject"], df["object"][~df["literal"]]]))
+        for n in entities:
+            category = categories.get(n)
+            if category == "instance":
+                cls = representative(instance_classes.get(n, "Thing"))
+                mapping[n] = f"{cls} instances"
+                nodes.setdefault(mapping[n], ("instance", name(cls), []))
+            elif category == "class" and representative(n) != n:
+                mapping[n] = representative(n)
+                nodes.setdefault(mapping[n], ("class", name(mapping[n]), [mapping[n]]))
+            else:
+                continue
+            nodes[mapping[n]][2].append(n)
+        subjects = df["subject"].map(mapping).fillna(df["subject"])
+        objects = df["object"].map(mapping).where(~df["literal"]).fillna(df["object"])
+        collapsed = df["literal"] & (subjects != df["subject"])
+        values = subjects[collapsed] + " " + df["predicate"][collapsed]
+        for n, p, v in zip(values, df["predicate"][collapsed], df["object"][collapsed]):
+            nodes.setdefault(n, ("literal", name(p), []))[2].append(v)
+        objects[collapsed] = values
+        aggregated = pd.DataFrame(
+            {
+                "subject": subjects,
+                "predicate": df["predicate"],
+                "object": objects,
+                "literal": df["literal"],
+            }
+        )
+        # drop relations within collapsed class subtrees
+        aggregated = aggregated[
+            (aggregated["subject"] != aggregated["object"])
+            | (df["subject"] == df["object"])
+            | (df["predicate"] != "subClassOf")
+        ]
+        aggregated = (
+            aggregated.groupby(
+                ["subject", "predicate", "object", "literal"], sort=False
+            )
+            .size()
+            .reset_index(name="weight")
+        )
+        units = {
+            "instance": ("instance", "instances"),
+            "class": ("class", "classes"),
+            "literal": ("value", "values"),
+        }
+        attributes = {}
+        for n, (category, label, members) in nodes.items():
+            members = sorted(set(members))
+            unit = units[category][len(members) > 1]
+            attributes[n] = {
+                "category": category,
+                "label": f"{label} ({len(members)} {unit})",
+                "title": ", ".join(members[:10])
+                + (", ..." if len(members) > 10 else ""),
+                "value": len(members),
+            }
+        return aggregated, attributes
+
+    @_instrumented
     def _plot_nxgraph(
         self,
         nxgraph: nx.MultiDiGraph,
@@ -1165,6 +3413,9 @@ class OntoEditor:
         font_color: str = "#FFFFFF",
         open_html: bool = False,
         interactive: bool = False,
+        layout: str = None,
+        layout_iterations: int = 50,
+        renderer: str = "pyvis",
     ) -> None:
         """create html file for the network's plot
 
@@ -1173,7 +3424,20 @@ class OntoEditor:
         :param font_color: font color for nodes as a hex code
         :param open_html: directly open the html file created using the default program
         :param interactive: activates mode for changing network appearance
+        :param layout: networkx layout used to position the nodes in advance
+            instead of simulating physics in the browser (optional), see
+            _layout_positions
+        :param layout_iterations: iteration budget of iterative layouts
+        :param renderer: pyvis for a self-contained html file, or webgl for a
+            data file rendered by a static html page, see _write_webgl
         """
+        if renderer == "webgl":
+            self._write_webgl(
+                nxgraph, bgcolor, font_color, open_html, layout, layout_iterations
+            )
+            return
+        if renderer != "pyvis":
+            raise ValueError(f"unknown renderer: {renderer}")
         net = Network(
             directed=True,
             height="100%",
@@ -1182,7 +3446,16 @@ class OntoEditor:
             font_color=font_color,
         )
         net.set_options(pkg_resources.read_text(config, "network_visualization.config"))
-        net.from_nx(nxgraph)
+        if layout:
+            positions = self._layout_positions(nxgraph, layout, layout_iterations)
+            nx.set_node_attributes(
+                nxgraph, {n: float(x) for n, (x, _) in positions.items()}, "x"
+            )
+            nx.set_node_attributes(
+                nxgraph, {n: float(y) for n, (_, y) in positions.items()}, "y"
+            )
+            net.options["physics"]["enabled"] = False
+        net.nodes, net.edges = self._pyvis_elements(nxgraph, font_color)
         if interactive:
             net.show_buttons()
         html_name = self.path.rsplit(".", 1)[0] + ".html"
@@ -1191,6 +3464,150 @@ class OntoEditor:
         else:
             net.write_html(html_name)
 
+    @staticmethod
+    def _pyvis_elements(nxgraph: nx.MultiDiGraph, font_color: str) -> tuple:
+        """convert a graph's nodes and edges to pyvis' node and edge options like
+        Network.from_nx(), which tests each node added against a list of all
+        nodes added before and thus does not scale to large graphs
+
+        :param nxgraph: networkx graph including the ontology's triples
+        :param font_color: font color for nodes as a hex code
+        :return: list of node options and list of edge options
+        """
+        nodes = []
+        for n, attributes in nxgraph.nodes(data=True):
+            options = dict(attributes)
+            options["size"] = int(options.get("size", 10))
+            label = options.pop("label", None) or n
+            shape = options.pop("shape", "dot")
+            nodes.append(Node(n, shape, label, font_color, **options).options)
+        edges = [
+            Edge(source, target, True, **{"weight": 1, **attributes}).options
+            for source, target, attributes in nxgraph.edges(data=True)
+        ]
+        return nodes, edges
+
+    def _write_webgl(
+        self,
+        nxgraph: nx.MultiDiGraph,
+        bgcolor: str = "#222222",
+        font_color: str = "#FFFFFF",
+        open_html: bool = False,
+        layout: str = None,
+        layout_iterations: int = 50,
+    ) -> None:
+        """write the network's nodes and edges as compact JSON to a data file
+        next to a static html page, which renders them using WebGL; the page is
+        only rewritten if its settings change, so that replotting only rewrites
+        the data file
+
+        :param nxgraph: networkx graph including the ontology's triples
+        :param bgcolor: background color as a hex code
+        :param font_color: font color for nodes as a hex code
+        :param open_html: directly open the html file created using the default program
+        :param layout: networkx layout used to position the nodes, see
+            _layout_positions; defaults to spring, but must be specified for
+            graphs with more than _default_layout_limit nodes
+        :param layout_iterations: iteration budget of iterative layouts
+        """
+        if not layout and len(nxgraph) > self._default_layout_limit:
+            raise ValueError(
+                f"layout required for more than {self._default_layout_limit} "
+                "nodes, e.g., circular, shell, or random"
+            )
+        positions = self._layout_positions(
+            nxgraph, layout or "spring", layout_iterations
+        )
+        index = {n: i for i, n in enumerate(nxgraph.nodes)}
+        palette: dict = {}
+        predicates: dict = {}
+        nodes: dict = {k: [] for k in ["id", "label", "title", "x", "y"]}
+        nodes.update(color=[], size=[])
+        for n, attributes in nxgraph.nodes(data=True):
+            nodes["id"].append(str(n))
+            nodes["label"].append(attributes.get("label"))
+            nodes["title"].append(attributes.get("title"))
+            nodes["x"].append(round(float(positions[n][0]), 2))
+            nodes["y"].append(round(float(positions[n][1]), 2))
+            color = attributes.get("color")
+            nodes["color"].append(palette.setdefault(color, len(palette)))
+            value = attributes.get("value")
+            nodes["size"].append(round(10 + 5 * math.log(value), 1) if value else 10)
+        edges: dict = {"source": [], "target": [], "label": []}
+        for source, target, label in nxgraph.edges(data="label"):
+            edges["source"].append(index[source])
+            edges["target"].append(index[target])
+            edges["label"].append(predicates.setdefault(label, len(predicates)))
+        data = {
+            "nodes": nodes,
+            "edges": edges,
+            "palette": list(palette),
+            "predicates": list(predicates),
+        }
+        stem = self.path.rsplit(".", 1)[0]
+        html_name = stem + ".html"
+        data_name = stem + "_data.js"
+        content = "ontorGraph = " + json.dumps(data, separators=(",", ":")) + ";\n"
+        with open(data_name, "wb") as f:
+            f.write(content.encode("utf8"))
+            self._bytes_written += f.tell()
+        page = string.Template(pkg_resources.read_text(config, "webgl_viewer.html"))
+        page = page.substitute(
+            data=os.path.basename(data_name), bgcolor=bgcolor, font_color=font_color
+        ).encode("utf8")
+        if (
+            not os.path.isfile(html_name)
+            or _file_hash(html_name) != hashlib.sha256(page).hexdigest()
+        ):
+            with open(html_name, "wb") as f:
+                f.write(page)
+                self._bytes_written += f.tell()
+        if open_html:
+            webbrowser.open("file://" + os.path.abspath(html_name))
+
+    def _layout_positions(
+        self, nxgraph: nx.MultiDiGraph, layout: str, iterations: int
+    ) -> dict:
+        """compute node positions for a plot using a networkx layout; positions
+        are cached per graph until the next modification of the onto
+
+        :param nxgraph: networkx graph including the ontology's triples
+        :param layout: spring, forceatlas2, kamada_kawai, spectral, circular,
+            shell, or random; spring and forceatlas2 are iterative, forceatlas2
+            requires networkx>=3.4, and spring, kamada_kawai, and spectral
+            require scipy for large graphs; circular, shell, and random scale to
+            the largest graphs
+        :param iterations: iteration budget of spring and forceatlas2
+        :return: dict with nodes as keys and their positions as values, scaled
+            to the number of nodes
+        """
+        layouts = ["spring", "forceatlas2", "kamada_kawai", "spectral"]
+        layouts += ["circular", "shell", "random"]
+        if layout not in layouts or not hasattr(nx, layout + "_layout"):
+            raise ValueError(f"layout not available: {layout}")
+        version = (self._revision, self.onto_world)
+        if self._layout_cache is None or self._layout_cache[0] != version:
+            self._layout_cache = (version, {})
+        key = (
+            layout,
+            iterations,
+            hash(frozenset(nxgraph.nodes)),
+            hash(frozenset(nxgraph.edges(keys=True))),
+        )
+        if key not in self._layout_cache[1]:
+            if layout == "spring":
+                positions = nx.spring_layout(nxgraph, iterations=iterations, seed=0)
+            elif layout == "forceatlas2":
+                positions = nx.forceatlas2_layout(nxgraph, max_iter=iterations, seed=0)
+            elif layout == "random":
+                positions = nx.random_layout(nxgraph, seed=0)
+            else:
+                positions = getattr(nx, layout + "_layout")(nxgraph)
+            # keep the density of nodes independent of their number
+            scale = 100 * max(len(positions), 1) ** 0.5
+            self._layout_cache[1][key] = nx.rescale_layout_dict(positions, scale)
+        return self._layout_cache[1][key]
+
     def _config_plot_query_body(
         self,
         classes: list = None,
@@ -1200,6 +3617,7 @@ class OntoEditor:
         tbox_only: bool = False,
         include_class_res: bool = True,
         show_class_descendants: bool = True,
+        direction: str = "out",
     ) -> str:
         """configure body for SPARQL query that identifies triples for plot
 
@@ -1211,9 +3629,10 @@ class OntoEditor:
         :param include_class_res: also return simplified spo-triples for class
             restrictions if True
         :param show_class_descendants: also explicitly include subclasses of the classes specified
+        :param direction: direction of the relations followed from focusnode,
+            see _neighborhood
         :return: body for SPARQL query
         """
-        max_radius = 5
         nodes_to_be_ignored = [
             "owl:Class",
             "owl:Thing",
@@ -1256,6 +3675,17 @@ class OntoEditor:
             "?res owl:onClass | owl:someValuesFrom | owl:allValuesFrom | owl:hasValue ?o . "
         )
         querypt1 = "SELECT DISTINCT ?s ?p ?o WHERE {\n"
+        query_rel_lim = ""
+        if focusnode and radius:
+            # objects are bound first so that only the neighborhood is matched;
+            # blank nodes cannot be bound via VALUES
+            neighborhood = self._neighborhood(focusnode, radius, properties, direction)
+            query_rel_lim = (
+                "VALUES ?o {"
+                + " ".join(n.n3() for n in neighborhood if not isinstance(n, BNode))
+                + "} . \n"
+            )
+        querypt1 += query_rel_lim
 
         if include_class_res:
             # NOTE: only atomic axioms are currently supported
@@ -1307,46 +3737,117 @@ class OntoEditor:
             querypt_nodes = "\n".join(query_nodes_dict.values())
         else:
             querypt_nodes = ""
-        query_rel_lim = ""
-        if focusnode and radius:
-            assert radius <= max_radius, "max radius violated"
-            if properties:
-                rels = properties
-            else:
-                rels = [p.name for p in self.onto.properties()]
-            query_rel_lim = (
-                ":"
-                + focusnode
-                + " "
-                + "?/".join(
-                    ["(rdf:type|rdfs:subClassOf|:" + "|:".join(rels) + ")"] * radius
-                )
-                + "? ?o . "
-            )
-        elif focusnode and not radius or not focusnode and radius:
+        if focusnode and not radius or not focusnode and radius:
             self.logger.warning(
                 "focus: both a focusnode and a radius must be specified - ignoring the focus"
             )
+        # NOTE: equivalent to MINUS since all variables are bound, but evaluated
+        # per solution instead of comparing each solution with all triples ignored
         querypt_ignore = ""
         for node in ["s", "o"]:
             querypt_ignore += (
-                "\nMINUS {\n?s ?p ?o . \n"
+                "\nFILTER NOT EXISTS {\n?s ?p ?o . \n"
                 + _sparql_set_in(node, nodes_to_be_ignored)
                 + "\n}"
             )
-        querypt_ignore += "\nMINUS {\n?s ?p ?o . \n ?o a owl:Restriction . \n}"
+        querypt_ignore += (
+            "\nFILTER NOT EXISTS {\n?s ?p ?o . \n ?o a owl:Restriction . \n}"
+        )
         query_body = "\n".join(
             [
                 querypt1,
                 querypt_rels,
                 querypt_nodes,
-                query_rel_lim,
                 querypt_ignore,
                 querypt2,
             ]
         )
         return query_body
 
+    def _adjacency(self) -> tuple:
+        """get the adjacency index of the onto's world, cached until the next
+        modification
+
+        :return: dicts mapping storids to lists of (predicate, node) tuples for
+            outgoing and incoming relations; nodes are storids or, for literals,
+            (value, datatype) tuples
+        """
+        if self._adjacency_cache is None or self._adjacency_cache[0] != (
+            self._revision,
+            self.onto_world,
+        ):
+            outgoing = collections.defaultdict(list)
+            incoming = collections.defaultdict(list)
+            graph = self.onto_world.graph
+            for s, p, o in graph.execute("SELECT s, p, o FROM objs"):
+                outgoing[s].append((p, o))
+                incoming[o].append((p, s))
+            for s, p, o, d in graph.execute("SELECT s, p, o, d FROM datas"):
+                outgoing[s].append((p, (o, d)))
+            self._adjacency_cache = (
+                (self._revision, self.onto_world),
+                outgoing,
+                incoming,
+            )
+        return self._adjacency_cache[1:]
+
+    def _neighborhood(
+        self,
+        focusnode: str,
+        radius: int,
+        properties: list = None,
+        direction: str = "out",
+    ) -> list:
+        """identify the nodes within a radius around a node by a breadth-first
+        search over the adjacency index; besides rdf:type and rdfs:subClassOf,
+        only the properties specified are followed
+
+        :param focusnode: node whose environment shall be identified
+        :param radius: maximum distance, i.e., relations, between a node and focusnode
+        :param properties: properties to follow, defaults to all of the onto's
+        :param direction: follow relations from subject to object (out), from
+            object to subject (in), or both
+        :return: rdflib terms of focusnode and the nodes within radius in the
+            order they were reached
+        """
+        if direction not in ["out", "in", "both"]:
+            raise ValueError(f"unknown direction: {direction}")
+        world = self.onto_world
+        focus = world._abbreviate(self.iri + "#" + focusnode, False)
+        if focus is None:
+            return [URIRef(self.iri + "#" + focusnode)]
+        outgoing, incoming = self._adjacency()
+        indexes = {"out": [outgoing], "in": [incoming], "both": [outgoing, incoming]}
+        names = properties or [p.name for p in self.onto.properties()]
+        predicates = {base.rdf_type, base.rdfs_subclassof} | {
+            world._abbreviate(self.iri + "#" + name, False) for name in names
+        }
+        reached = {focus}
+        frontier = [focus]
+        ordered = [focus]
+        for _ in range(radius):
+            next_frontier = []
+            for node in frontier:
+                # literals do not have any relations
+                if isinstance(node, tuple):
+                    continue
+                for index in indexes[direction]:
+                    for p, neighbor in index.get(node, []):
+                        if p in predicates and neighbor not in reached:
+                            reached.add(neighbor)
+                            next_frontier.append(neighbor)
+                            ordered.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        unabbreviate = functools.lru_cache(maxsize=None)(world._unabbreviate)
+        return [
+            self._rdflib_literal(*node, unabbreviate)
+            if isinstance(node, tuple)
+            else self._rdflib_term(node, unabbreviate)
+            for node in ordered
+        ]
+
     def _render_by_label(
         self, graph: nx.MultiDiGraph, lang: str = None
     ) -> nx.MultiDiGraph:
@@ -1357,14 +3858,15 @@ class OntoEditor:
         :param lang: desired label language
         :return: graph w/ labels instead of names
         """
+        # labels are language-tagged strings, which graph exports do not support
         mapping: dict = {}
         for n in graph.nodes():
-            label = self._name_to_label(n, lang)
+            label = str(self._name_to_label(n, lang))
             if label != n:
                 mapping[n] = label
         graph = nx.relabel_nodes(graph, mapping)
         for e in graph.edges.items():
-            label = self._name_to_label(e[1]["label"], lang)
+            label = str(self._name_to_label(e[1]["label"], lang))
             if label != e[1]["label"]:
                 e[1]["label"] = label
         return graph
@@ -1378,19 +3880,117 @@ class OntoEditor:
         :return: elem's (first) label, defaults to name if there is no label
             available in the language specified available
         """
-        try:
-            elem = self.onto[name]
-            if not lang and elem.label.first():
-                label = elem.label.first()
-            elif [l for l in elem.label if l.lang == lang]:
-                label = [l for l in elem.label if l.lang == lang][0]
-            else:
-                label = name
-        # catch literals
-        except AttributeError:
-            label = name
-        return label
+        # literals and entities without labels are not included in the index
+        labels = self.get_labels(name, lang)
+        return labels[0] if labels else name
+
+    @_instrumented
+    def build_graph(
+        self,
+        classes: list = None,
+        properties: list = None,
+        focusnode: str = None,
+        radius: int = None,
+        bylabel: bool = False,
+        lang: str = None,
+        tbox_only: bool = False,
+        classcolor: str = "#0065bd",
+        instancecolor: str = "#98c6ea",
+        timeout: float = None,
+        colors: dict = None,
+        direction: str = "out",
+        aggregate: int = None,
+        aggregate_depth: int = None,
+    ) -> nx.MultiDiGraph:
+        """build the networkx graph plotted by visualize, e.g., for analyzing
+        selected parts of the onto with networkx; see visualize for the
+        parameters
+
+        :return: graph with nodes named or labeled like in plots, node colors,
+            and predicates as edge labels
+        """
+        # graph coloring settings; note that literals default to grey
+        coloring = {"class": classcolor, "instance": instancecolor, **(colors or {})}
 
+        if not classes and not properties and not focusnode and not radius:
+            graphdata = self._ntriples_to_df()
+        else:
+            query_body = self._config_plot_query_body(
+                classes, properties, focusnode, radius, tbox_only, direction=direction
+            )
+            query_results = self.query_onto(
+                self._build_query(query_body), timeout=timeout
+            )
+            graphdata = self._query_results_to_df(query_results)
+        categories = self._node_categories()
+        aggregates: dict = {}
+        if aggregate is not None and (
+            pd.unique(pd.concat([graphdata["subject"], graphdata["object"]])).size
+            > aggregate
+        ):
+            graphdata, aggregates = self._aggregate_df(
+                graphdata, aggregate_depth, bylabel, lang
+            )
+            categories = {
+                **categories,
+                **{n: a.pop("category") for n, a in aggregates.items()},
+            }
+        nxgraph = self._df_to_nx_incl_labels(graphdata, coloring, categories)
+        nx.set_node_attributes(nxgraph, aggregates)
+        if bylabel:
+            nxgraph = self._render_by_label(nxgraph, lang)
+        return nxgraph
+
+    @_instrumented
+    def export_graph(
+        self,
+        path: str,
+        fmt: str = None,
+        compression: str = None,
+        **kwargs,
+    ) -> None:
+        """write the networkx graph plotted by visualize to a file for analyzing
+        it with other tools, without rendering it
+
+        :param path: path including filename
+        :param fmt: graphml, gexf, or edgelist, i.e., tab-separated lines of
+            subject, object, and predicate; inferred from the path's extension
+            if not specified
+        :param compression: gzip, bz2, or xz, inferred from the path's extension
+            if not specified
+        :param kwargs: parameters for selecting and labeling the graph's nodes,
+            see build_graph
+        """
+        extensions = [""] + os.path.basename(path).split(".")[1:]
+        if compression is None:
+            compression = _COMPRESSION_EXTENSIONS.get(extensions[-1])
+        if compression not in [None, *_COMPRESSORS]:
+            raise ValueError(f"unsupported compression: {compression}")
+        if fmt is None:
+            # e.g., graph.graphml.gz
+            if extensions[-1] in _COMPRESSION_EXTENSIONS:
+                extensions.pop()
+            fmt = {"tsv": "edgelist", "txt": "edgelist"}.get(
+                extensions[-1], extensions[-1]
+            )
+        writers = {
+            "graphml": nx.write_graphml,
+            "gexf": nx.write_gexf,
+            "edgelist": functools.partial(
+                nx.write_edgelist, delimiter="\t", data=["label", "weight"]
+            ),
+        }
+        if fmt not in writers:
+            raise ValueError(f"unsupported graph format: {fmt}")
+        nxgraph = self.build_graph(**kwargs)
+        with ExitStack() as stack:
+            file = stack.enter_context(open(path, "wb"))
+            if compression:
+                file = stack.enter_context(_COMPRESSORS[compression](file, "wb"))
+            writers[fmt](nxgraph, file)
+        self._bytes_written += os.path.getsize(path)
+
+    @_instrumented
     def visualize(
         self,
         classes: list = None,
@@ -1405,14 +4005,22 @@ class OntoEditor:
         classcolor: str = "#0065bd",
         instancecolor: str = "#98c6ea",
         font_color: str = "#FFFFFF",
+        timeout: float = None,
+        colors: dict = None,
+        direction: str = "out",
+        layout: str = None,
+        layout_iterations: int = 50,
+        aggregate: int = None,
+        aggregate_depth: int = None,
+        renderer: str = "pyvis",
     ) -> None:
         """visualize onto as a graph; generates html
 
         :param classes: list of classes to be included in plot
         :param properties: list of properties to be included in plot
         :param focusnode: node around which a partial graph shall be displayed
-        :param radius: maximum number of relations between a node and a node of
-            one of the classes specified
+        :param radius: maximum number of relations between focusnode and the
+            objects of the triples displayed
         :param bylabel: render visualization by labels (if available)
         :param lang: language of the labels to be displayed
         :param open_html: open html file generated
@@ -1421,25 +4029,54 @@ class OntoEditor:
         :param classcolor: color of class nodes as a hex code
         :param instancecolor: color of instance nodes as a hex code
         :param font_color: font color for nodes as a hex code
+        :param timeout: maximum time in seconds for querying partial graphs,
+            e.g., large radii (optional)
+        :param colors: colors as hex codes by node category (optional), i.e.,
+            class, instance, object_property, data_property, restriction, or
+            literal; overrides classcolor and instancecolor
+        :param direction: direction of the relations followed from focusnode,
+            i.e., from subject to object (out), the reverse (in), or both
+        :param layout: compute node positions with this networkx layout instead
+            of simulating physics in the browser, which does not scale to large
+            graphs (optional); spring, forceatlas2, kamada_kawai, spectral,
+            circular, shell, or random
+        :param layout_iterations: iteration budget of spring and forceatlas2
+        :param aggregate: collapse instances of the same class into a single
+            node if the plot would contain more nodes than this (optional); 0
+            always collapses them
+        :param aggregate_depth: when collapsing instances, also collapse class
+            subtrees beyond this depth into their ancestors, where top level
+            classes have depth 0 (optional)
+        :param renderer: pyvis for a self-contained html file, or webgl for
+            large graphs, which writes nodes and edges to a separate data file
+            rendered by a static html page; only the data file is rewritten when
+            replotting, and nodes are positioned using layout, defaulting to
+            spring for graphs with up to 2000 nodes, whereas larger graphs
+            require a layout that scales, e.g., circular, shell, or random
         :return: None
         """
-        # graph coloring settings; note that literals default to grey
-        coloring = {
-            classcolor: [c.name for c in self.onto.classes()],
-            instancecolor: [i.name for i in self.onto.individuals()],
-        }
-
-        if not classes and not properties and not focusnode and not radius:
-            graphdata = self._ntriples_to_df()
-        else:
-            query_body = self._config_plot_query_body(
-                classes, properties, focusnode, radius, tbox_only
-            )
-            query_results = self.query_onto(self._build_query(query_body))
-            graphdata = self._query_results_to_df(query_results)
-        nxgraph = self._df_to_nx_incl_labels(graphdata, coloring)
-        if bylabel:
-            nxgraph = self._render_by_label(nxgraph, lang)
+        nxgraph = self.build_graph(
+            classes=classes,
+            properties=properties,
+            focusnode=focusnode,
+            radius=radius,
+            bylabel=bylabel,
+            lang=lang,
+            tbox_only=tbox_only,
+            classcolor=classcolor,
+            instancecolor=instancecolor,
+            timeout=timeout,
+            colors=colors,
+            direction=direction,
+            aggregate=aggregate,
+            aggregate_depth=aggregate_depth,
+        )
         self._plot_nxgraph(
-            nxgraph=nxgraph, open_html=open_html, bgcolor=bgcolor, font_color=font_color
+            nxgraph=nxgraph,
+            open_html=open_html,
+            bgcolor=bgcolor,
+            font_color=font_color,
+            layout=layout,
+            layout_iterations=layout_iterations,
+            renderer=renderer,
         )
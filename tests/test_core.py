@@ -1,16 +1,30 @@
 #!/usr/bin/env python3
 
 import filecmp
+import gc
+import gzip
+import itertools
+import json
+import lzma
 import os
 import sys
+import tempfile
+import threading
 import unittest
 import unittest.mock
+import weakref
 from contextlib import contextmanager
+from io import BytesIO
 from pathlib import Path
 
 from owlready2.class_construct import Restriction
 from owlready2 import DataProperty
 from owlready2 import FunctionalProperty
+from owlready2 import locstr
+from owlready2 import Thing
+
+import networkx as nx
+import pandas as pd
 
 import ontor
 
@@ -190,6 +204,7 @@ class TestCore(unittest.TestCase):
     def tearDown(self):
         """remove temporary files: ontology and logs"""
         ensure_file_absent(self.fname)
+        ensure_file_absent(self.fname + ".journal")
         ontor.cleanup(True, "log")
 
     def test_onto_creation(self):
@@ -562,6 +577,862 @@ class TestCore(unittest.TestCase):
             "complex axiom not added as expected",
         )
 
+    def test_edit_session(self):
+        """test that edit sessions defer saving and roll back on errors"""
+        mtime = os.path.getmtime(self.fname)
+        with self.ontor1.edit_session():
+            self.ontor1.add_taxo([["calzone", "pizza"]])
+            self.ontor1.add_label("calzone", "calzone", "en")
+            self.assertEqual(
+                os.path.getmtime(self.fname), mtime, "onto saved during session"
+            )
+        self.assertNotEqual(
+            os.path.getmtime(self.fname), mtime, "onto not saved on commit"
+        )
+        with self.assertRaises(RuntimeError):
+            with self.ontor1.edit_session():
+                self.ontor1.add_taxo([["stromboli", "pizza"]])
+                raise RuntimeError
+        self.assertIn("calzone", [c.name for c in self.ontor1.onto.classes()])
+        self.assertNotIn(
+            "stromboli",
+            [c.name for c in self.ontor1.onto.classes()],
+            "changes not rolled back as expected",
+        )
+
+    def test_session_first_change_fails(self):
+        """test that partial changes of a session's first, failing change are
+        rolled back and not saved later on
+        """
+        with self.assertRaises(RuntimeError):
+            with self.ontor1.edit_session():
+                with unittest.mock.patch.object(
+                    self.ontor1, "_save", side_effect=RuntimeError
+                ):
+                    self.ontor1.add_taxo([["calzone", "pizza"]])
+        self.assertIsNone(self.ontor1.onto["calzone"], "changes not rolled back")
+        self.ontor1.add_taxo([["stromboli", "pizza"]])
+        self.assertNotIn(
+            "calzone",
+            [c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()],
+            "rolled back changes saved later on",
+        )
+
+    def test_quadstore(self):
+        """test that changes are persisted in and reopened from a quadstore"""
+        quadstore = "./onto-ex.sqlite3"
+        ensure_file_absent(quadstore)
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, quadstore=quadstore)
+        self.assertEqual(
+            len(list(ontor2.onto.classes())),
+            len(self.classes),
+            "onto not loaded into quadstore as expected",
+        )
+        ontor2.add_taxo([["calzone", "pizza"]])
+        ontor2.onto_world.close()
+        ontor3 = ontor.OntoEditor(self.iri, self.fname, quadstore=quadstore)
+        self.assertIn(
+            "calzone",
+            [c.name for c in ontor3.onto.classes()],
+            "change not committed to quadstore",
+        )
+        self.assertNotIn(
+            "calzone",
+            [c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()],
+            "ontology file changed without export",
+        )
+        ontor3.onto_world.close()
+        ensure_file_absent(quadstore)
+
+    def test_load_cache(self):
+        """test that parsed onto files are cached and invalidated upon changes"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ontor.LoadCache(cache_dir)
+            self.assertIsNone(cache.load(self.fname), "unexpected cache entry")
+            ontor2 = ontor.OntoEditor(self.iri, self.fname, load_cache=cache)
+            cached_onto = cache.load(self.fname)
+            self.assertIsNotNone(cached_onto, "onto file not cached")
+            self.assertEqual(
+                {c.name for c in cached_onto.classes()},
+                {c.name for c in ontor2.onto.classes()},
+                "cached onto not as expected",
+            )
+            ontor2.add_taxo([["calzone", "pizza"]])
+            self.assertIsNone(cache.load(self.fname), "outdated cache entry used")
+            ontor3 = ontor.OntoEditor(self.iri, self.fname, load_cache=cache)
+            self.assertIn("calzone", [c.name for c in ontor3.onto.classes()])
+            unrelated = os.path.join(cache_dir, "unrelated.sqlite3")
+            Path(unrelated).touch()
+            cache.clear()
+            self.assertEqual(
+                os.listdir(cache_dir), ["unrelated.sqlite3"], "cache not cleared"
+            )
+
+    def test_journal(self):
+        """test that changes are journaled, replayed, and compacted"""
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, journal=True)
+        mtime = os.path.getmtime(self.fname)
+        ontor2.add_taxo([["calzone", "pizza"]])
+        ontor2.add_axioms([["calzone"] + self.axs[2][1:]])
+        ontor2.add_label("calzone", "calzone", "en")
+        self.assertEqual(
+            os.path.getmtime(self.fname), mtime, "onto file rewritten despite journal"
+        )
+        ontor3 = ontor.OntoEditor(self.iri, self.fname, journal=True)
+        self.assertIn(
+            ontor3.onto["has_topping"].exactly(0, ontor3.onto["meat"]),
+            ontor3.onto["calzone"].is_a,
+            "journal not replayed as expected",
+        )
+        self.assertEqual(
+            [(str(l), l.lang) for l in ontor3.onto["calzone"].label],
+            [("calzone", "en")],
+            "journaled label not as expected",
+        )
+        ontor3.compact()
+        self.assertFalse(os.path.isfile(self.fname + ".journal"))
+        self.assertIn(
+            "calzone",
+            [c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()],
+            "journal not compacted as expected",
+        )
+
+    def test_journal_recovery(self):
+        """test that journals with torn lines and carriage returns are replayed"""
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, journal=True)
+        ontor2.add_label("pizza", "thin\rcrust", "en")
+        with open(self.fname + ".journal", "ab") as f:
+            f.write(b"+ <http://example.org/onto-ex.owl#P2> <http://www.w3")
+        ontor3 = ontor.OntoEditor(self.iri, self.fname, journal=True)
+        self.assertEqual(
+            [str(l) for l in ontor3.onto["pizza"].label],
+            ["thin\rcrust"],
+            "journaled carriage return not as expected",
+        )
+        with open(self.fname + ".journal", "rb") as f:
+            self.assertTrue(f.read().endswith(b" .\n"), "torn line not truncated")
+
+    def test_background_save(self):
+        """test that background saves are written once flushed"""
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, background_save=True)
+        for cls in ["calzone", "stromboli"]:
+            ontor2.add_taxo([[cls, "pizza"]])
+        self.assertTrue(ontor2.flush(timeout=60), "background save not finished")
+        self.assertFalse(os.path.isfile(self.fname + ".tmp"))
+        self.assertTrue(
+            {"calzone", "stromboli"}.issubset(
+                c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()
+            ),
+            "background save not written as expected",
+        )
+
+    def test_background_close(self):
+        """test that closing editors writes pending saves and ends the thread,
+        and that idle editors can be garbage collected
+        """
+        with ontor.OntoEditor(self.iri, self.fname, background_save=True) as ontor2:
+            ontor2.add_taxo([["calzone", "pizza"]])
+            saver = ontor2._saver
+        self.assertFalse(saver.is_alive(), "background thread not stopped")
+        self.assertIn(
+            "calzone",
+            [c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()],
+            "pending save not written on close",
+        )
+        ontor3 = ontor.OntoEditor(self.iri, self.fname, background_save=True)
+        ontor3.add_taxo([["stromboli", "pizza"]])
+        ontor3.flush()
+        editor, saver = weakref.ref(ontor3), ontor3._saver
+        del ontor3
+        gc.collect()
+        saver.join(timeout=60)
+        self.assertIsNone(editor(), "idle editor not garbage collected")
+        self.assertFalse(saver.is_alive(), "background thread not stopped")
+
+    def test_stream_ntriples(self):
+        """test that ntriples are streamed as saved by owlready2"""
+        self.ontor1.add_label("pizza", 'say "cheese"\n', "en")
+        expected = BytesIO()
+        self.ontor1.onto.save(file=expected, format="ntriples")
+        expected = expected.getvalue().decode("utf8").splitlines(keepends=True)
+        self.assertEqual(
+            sorted(self.ontor1.iter_ntriples()),
+            sorted(expected),
+            "streamed ntriples not as expected",
+        )
+        buffer = BytesIO()
+        self.ontor1.write_ntriples(buffer, compression="gzip")
+        self.assertEqual(
+            sorted(gzip.decompress(buffer.getvalue()).decode("utf8").splitlines(True)),
+            sorted(expected),
+            "compressed ntriples not as expected",
+        )
+        buffer = BytesIO()
+        self.ontor1.write_ntriples(buffer, compression="xz")
+        self.assertEqual(
+            sorted(lzma.decompress(buffer.getvalue()).decode("utf8").splitlines(True)),
+            sorted(expected),
+            "xz compressed ntriples not as expected",
+        )
+
+    def test_chunked_input(self):
+        """test that chunked CSV and JSON input is added as expected"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, "taxo.csv")
+            with open(csv_path, "w") as f:
+                f.write("class,superclass\n")
+                f.writelines(f"pizza_{i},pizza\n" for i in range(5))
+            json_path = os.path.join(tmpdir, "taxo.json")
+            with open(json_path, "w") as f:
+                f.write('[["calzone", "pizza"], ["stromboli", "pizza"]]')
+            self.assertEqual(
+                [len(c) for c in ontor.iter_csv(csv_path, chunk_size=2)],
+                [2, 2, 1],
+                "CSV chunks not as expected",
+            )
+            self.assertEqual(
+                list(ontor.iter_json(json_path, chunk_size=1, buffer_size=4)),
+                [[["calzone", "pizza"]], [["stromboli", "pizza"]]],
+                "JSON chunks not as expected",
+            )
+            count = self.ontor1.add_chunked(
+                self.ontor1.add_taxo,
+                itertools.chain(
+                    ontor.iter_csv(csv_path, chunk_size=2), ontor.iter_json(json_path)
+                ),
+            )
+        self.assertEqual(count, 7, "number of processed tuples not as expected")
+        self.assertTrue(
+            {"pizza_4", "calzone", "stromboli"}.issubset(
+                c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()
+            ),
+            "chunked input not added as expected",
+        )
+
+        def _chunks():
+            yield [["quattro_stagioni", "pizza"]]
+            raise ValueError("malformed chunk")
+            yield [["diavola", "pizza"]]
+
+        with self.assertRaises(ValueError):
+            self.ontor1.add_chunked(self.ontor1.add_taxo, _chunks())
+        self.assertIsNone(
+            self.ontor1.onto["quattro_stagioni"], "chunks not rolled back on error"
+        )
+        self.assertNotIn(
+            "quattro_stagioni",
+            [c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()],
+            "chunks saved despite error",
+        )
+
+    def test_instances_bulk(self):
+        """test that instances added in bulk match those added one by one"""
+        ins = [
+            ["Mary", "vegetarian", "likes", "His_pizza", None],
+            ["Her_pizza", "margherita", "price", "8.5", "float"],
+            ["Her_pizza", "margherita", "price", "9.5", "float"],
+            ["Her_pizza", "margherita", "description", "thin", None],
+            ["John", "vegetarian", "likes", "Her_pizza", None],
+            ["Nobody", "no_such_class", None, None, None],
+        ]
+        ontor2 = ontor.OntoEditor(self.iri, self.fname)
+        ontor2.add_instances(ins[:-1])
+        self.ontor1.add_instances_bulk(ins, batch_size=2)
+        subjects = tuple(f"<{self.iri}#{i}>" for i in ["Mary", "Her_pizza", "John"])
+        self.assertEqual(
+            sorted(t for t in self.ontor1.iter_ntriples() if t.startswith(subjects)),
+            sorted(t for t in ontor2.iter_ntriples() if t.startswith(subjects)) or None,
+            "instances added in bulk not as expected",
+        )
+        self.assertEqual(
+            self.ontor1.onto["John"].likes,
+            [self.ontor1.onto["His_pizza"], self.ontor1.onto["Her_pizza"]],
+            "relations of loaded instance not updated as expected",
+        )
+        self.assertEqual(
+            ontor.OntoEditor(self.iri, self.fname).onto["Her_pizza"].price,
+            9.5,
+            "functional dp value not replaced as expected",
+        )
+        self.assertEqual(
+            [i.name for i in ontor.OntoEditor(self.iri, self.fname).onto["Mary"].likes],
+            ["His_pizza"],
+            "instances added in bulk not saved",
+        )
+
+    def test_session_without_snapshot(self):
+        """test that bulk inputs do not serialize the onto for rollbacks and
+        that rollbacks without snapshots restore the onto from file
+        """
+        with unittest.mock.patch.object(
+            self.ontor1, "_serialize", wraps=self.ontor1._serialize
+        ) as serialize:
+            self.ontor1.add_instances_bulk([["Mary", "vegetarian", None, None, None]])
+            self.ontor1.add_chunked(self.ontor1.add_taxo, [[["calzone", "pizza"]]])
+            serialize.assert_not_called()
+        insert, inserted = self.ontor1._insert_instance_batch, []
+
+        def _insert_once(batch, entities):
+            if inserted:
+                raise RuntimeError
+            inserted.append(batch)
+            return insert(batch, entities)
+
+        with unittest.mock.patch.object(
+            self.ontor1, "_insert_instance_batch", side_effect=_insert_once
+        ):
+            with self.assertRaises(RuntimeError):
+                self.ontor1.add_instances_bulk(
+                    [
+                        ["Anna", "vegetarian", None, None, None],
+                        ["Bob", "vegetarian", None, None, None],
+                    ],
+                    batch_size=1,
+                )
+        self.assertEqual(inserted, [[["Anna", "vegetarian", None, None, None]]])
+        self.assertIsNone(self.ontor1.onto["Anna"], "batches not rolled back")
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, background_save=True)
+        ontor2.add_taxo([["stromboli", "pizza"]])
+        with self.assertRaises(RuntimeError):
+            with ontor2.edit_session(snapshot=False):
+                ontor2.add_taxo([["quattro_stagioni", "pizza"]])
+                raise RuntimeError
+        ontor2.close()
+        classes = [
+            c.name for c in ontor.OntoEditor(self.iri, self.fname).onto.classes()
+        ]
+        self.assertEqual(
+            [c in classes for c in ["calzone", "stromboli", "quattro_stagioni"]],
+            [True, True, False],
+            "onto not restored from file on rollback without snapshot",
+        )
+        self.assertEqual(
+            [
+                c in [c.name for c in ontor2.onto.classes()]
+                for c in ["stromboli", "quattro_stagioni"]
+            ],
+            [True, False],
+            "onto not restored from file on rollback without snapshot",
+        )
+
+    def test_taxo_unordered(self):
+        """test that unordered taxonomies are sorted and invalid parts skipped"""
+        self.ontor1.add_taxo(
+            [
+                ["neapolitan", "thin_crust_pizza"],
+                ["thin_crust_pizza", "pizza"],
+                ["cyclic_a", "cyclic_b"],
+                ["cyclic_b", "cyclic_a"],
+                ["orphan", "no_such_class"],
+                ["orphan_child", "orphan"],
+                ["margherita", "thin_crust_pizza"],
+            ]
+        )
+        self.ontor1.add_taxo({"neapolitan": ["marinara"]})
+        self.ontor1.add_taxo([["beverage", ""], ["lemonade", "beverage"]])
+        onto = ontor.OntoEditor(self.iri, self.fname).onto
+        self.assertEqual(
+            onto["beverage"].is_a, [Thing], "empty superclass not read as owl:Thing"
+        )
+        self.assertIn(onto["lemonade"], onto["beverage"].descendants())
+        self.assertEqual(
+            onto["neapolitan"].is_a,
+            [onto["thin_crust_pizza"]],
+            "unordered class tuples not added as expected",
+        )
+        self.assertEqual(
+            onto["margherita"].is_a,
+            [onto["vegetarian_pizza"], onto["thin_crust_pizza"]],
+            "existing class not extended as expected",
+        )
+        self.assertIn(onto["marinara"], onto["pizza"].descendants())
+        for cls in ["cyclic_a", "cyclic_b", "orphan", "orphan_child"]:
+            self.assertIsNone(onto[cls], f"invalid class {cls} not skipped")
+
+    def test_graph_cache(self):
+        """test that the rdflib graph view is cached until the next modification"""
+        query = "SELECT ?c WHERE { ?c rdfs:subClassOf :pizza . }"
+        revision = self.ontor1.revision
+        graph_cache = self.ontor1._rdflib_graph()
+        self.assertEqual(len(self.ontor1.query_onto(query)), 1)
+        self.assertIs(self.ontor1._rdflib_graph()[0], graph_cache[0])
+        self.assertEqual(self.ontor1._graph_cache[0][0], revision)
+        self.ontor1.add_taxo([["calzone", "pizza"]])
+        self.assertGreater(self.ontor1.revision, revision, "revision not bumped")
+        self.assertEqual(
+            len(self.ontor1.query_onto(query)), 2, "query results not updated"
+        )
+        self.assertEqual(self.ontor1._graph_cache[0][0], self.ontor1.revision)
+
+    def test_prepared_queries(self):
+        """test that queries are only parsed once"""
+        axioms = self.ontor1.get_axioms()
+        hits = ontor.ontor._prepare_query.cache_info().hits
+        self.assertEqual(self.ontor1.get_axioms(), axioms, "axioms differ")
+        self.assertEqual(
+            ontor.ontor._prepare_query.cache_info().hits,
+            hits + 3,
+            "prepared axiom queries not reused",
+        )
+
+    def test_native_axioms(self):
+        """test that native axiom extraction yields the same rows as SPARQL"""
+        self.ontor1.add_axioms(
+            [
+                {
+                    "or": [
+                        ["margherita"] + self.axs[2][1:],
+                        {"and": [self.axs[0], ["human"] + self.axs[1][1:]]},
+                    ]
+                },
+            ]
+        )
+        sparql = self.ontor1.get_axioms()
+        native = self.ontor1.get_axioms(engine="native")
+        self.assertEqual(native, sparql, "native axioms not as expected")
+        self.assertEqual(
+            [tuple(r) for r in native[0]],
+            [tuple(r) for r in sparql[0]],
+            "order of native axioms not as expected",
+        )
+        with self.assertRaises(ValueError):
+            self.ontor1.get_axioms(engine="hermit")
+
+    def test_stream_query(self):
+        """test lazy query results, paging, and chunked dataframes"""
+        query = "SELECT ?s ?o WHERE { ?s rdf:type ?o . } ORDER BY ?s ?o"
+        for engine in ["rdflib", "owlready"]:
+            results = self.ontor1.query_onto(query, engine=engine)
+            rows = self.ontor1.iter_query(query, engine=engine)
+            self.assertNotIsInstance(rows, list, "query results not streamed")
+            self.assertEqual(list(rows), results, "streamed results not as expected")
+            self.assertEqual(
+                list(self.ontor1.iter_query(query, engine=engine, page_size=3)),
+                results,
+                "paged results not as expected",
+            )
+        dfs = list(self.ontor1.iter_query_df(query, chunk_size=4))
+        self.assertTrue(
+            all(len(df) <= 4 for df in dfs), "dataframe chunks exceed chunk size"
+        )
+        df = pd.concat(dfs, ignore_index=True)
+        self.assertEqual(list(df.columns), ["s", "o"], "columns not as expected")
+        self.assertEqual(
+            df.values.tolist(),
+            [[str(s), str(o)] for s, o in self.ontor1.query_onto(query)],
+            "dataframe contents not as expected",
+        )
+        with self.assertRaises(ValueError):
+            self.ontor1.iter_query(query + " LIMIT 5", page_size=3)
+
+    def test_query_cache(self):
+        """test reuse and invalidation of cached query results"""
+        cache = ontor.QueryCache(max_entries=2)
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, query_cache=cache)
+        query = "SELECT ?c WHERE { ?c rdfs:subClassOf :food . }"
+        results = ontor2.query_onto(query)
+        self.assertEqual(
+            ontor2.query_onto(query.replace(" ", "\n  ")),
+            results,
+            "cached results not as expected",
+        )
+        self.assertEqual(
+            [cache.stats["hits"], cache.stats["misses"]],
+            [1, 1],
+            "reformatted query not served from cache",
+        )
+        ontor2.add_taxo([["cheese", "food"]])
+        self.assertEqual(
+            len(ontor2.query_onto(query)),
+            len(results) + 1,
+            "cached results not invalidated by modification",
+        )
+        self.assertEqual(
+            ontor2.get_axioms(engine="native"),
+            ontor2.get_axioms(engine="native"),
+            "cached axioms not as expected",
+        )
+        self.assertEqual(cache.stats["entries"], 2, "cache size limit not applied")
+        self.assertGreater(cache.stats["evictions"], 0, "no results evicted")
+
+    def test_query_limits(self):
+        """test timeouts, row limits, and cancellation of queries"""
+        query = "SELECT ?c WHERE { ?c a owl:Class . }"
+        n_classes = len(self.ontor1.query_onto(query))
+        self.assertEqual(
+            len(self.ontor1.query_onto(query, timeout=10, max_rows=n_classes)),
+            n_classes,
+            "results within limits not as expected",
+        )
+        slow_query = "SELECT (COUNT(*) AS ?n) WHERE { %s }" % " . ".join(
+            f"?s{i} ?p{i} ?o{i}" for i in range(5)
+        )
+        cancel = threading.Event()
+        cancel.set()
+        for engine in ["rdflib", "owlready"]:
+            with self.assertRaises(ontor.QueryLimitError):
+                self.ontor1.query_onto(query, engine=engine, max_rows=n_classes - 1)
+            with self.assertRaises(ontor.QueryLimitError):
+                self.ontor1.query_onto(slow_query, engine=engine, timeout=0.1)
+            with self.assertRaises(ontor.QueryLimitError):
+                self.ontor1.query_onto(slow_query, engine=engine, cancel=cancel)
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, query_cache=ontor.QueryCache())
+        self.assertEqual(len(ontor2.query_onto(query)), n_classes)
+        with self.assertRaises(ontor.QueryLimitError):
+            ontor2.query_onto(query, max_rows=n_classes - 1)
+
+    def test_metrics(self):
+        """test recording and export of operation metrics"""
+        metrics = ontor.Metrics()
+        calls = []
+        metrics.hooks.append(lambda *args: calls.append(args))
+        ontor2 = ontor.OntoEditor(self.iri, self.fname, metrics=metrics)
+        ontor2.add_taxo([["cheese", "food"]])
+        ontor2.query_onto("SELECT ?c WHERE { ?c rdfs:subClassOf :food . }")
+        with self.assertRaises(ValueError):
+            ontor2.query_onto("SELECT ?c WHERE { ?c a owl:Class . }", engine="foo")
+        stats = metrics.to_dict()
+        self.assertEqual(stats["query_onto"]["calls"], 2, "calls not counted")
+        self.assertEqual(stats["query_onto"]["errors"], 1, "errors not counted")
+        self.assertGreater(stats["add_taxo"]["triples"], 0, "triples not counted")
+        self.assertEqual(
+            stats["_save"]["bytes_written"],
+            os.path.getsize(self.fname),
+            "bytes written not as expected",
+        )
+        self.assertEqual(
+            stats["add_taxo"]["histogram"]["+Inf"], 1, "histogram not as expected"
+        )
+        self.assertEqual(
+            [c[0] for c in calls],
+            ["_save", "add_taxo", "query_onto", "query_onto"],
+            "hooks not called as expected",
+        )
+        self.assertEqual(json.loads(metrics.to_json()), stats, "JSON not as expected")
+        self.assertIn(
+            'ontor_duration_seconds_count{operation="add_taxo"} 1',
+            metrics.to_prometheus().splitlines(),
+            "Prometheus export not as expected",
+        )
+
+    def test_label_index(self):
+        """test label lookups via the label index and its maintenance"""
+        self.ontor1.add_label("human", "human", "en")
+        self.assertEqual(
+            self.ontor1.get_labels("human"),
+            [locstr("human", "en")],
+            "labels not as expected",
+        )
+        self.ontor1.add_label("human", "homme", "fr")
+        self.ontor1.add_label("pizza", "Pizza Napoletana")
+        self.assertEqual(
+            self.ontor1.get_labels("human", "fr"),
+            [locstr("homme", "fr")],
+            "index not updated by add_label",
+        )
+        self.assertEqual(
+            self.ontor1._name_to_label("human", "fr"),
+            locstr("homme", "fr"),
+            "label lookup not as expected",
+        )
+        self.assertEqual(
+            self.ontor1.find_by_label("homme"),
+            [self.iri + "#human"],
+            "entities found by label not as expected",
+        )
+        self.assertEqual(
+            self.ontor1.find_by_label("napoletana", exact=False),
+            [self.iri + "#pizza"],
+            "entities found by substring not as expected",
+        )
+        self.assertEqual(
+            self.ontor1.find_by_label("homme", "en"), [], "language not considered"
+        )
+        self.ontor1.remove_elements(["human"])
+        self.assertEqual(
+            self.ontor1.find_by_label("homme"), [], "index not rebuilt after removal"
+        )
+
+    def test_triples_df(self):
+        """test conversion of the onto's triples to a dataframe of names"""
+        self.ontor1.add_label("pizza", "thin crust pizza", "en")
+        df = self.ontor1._ntriples_to_df()
+        self.assertEqual(
+            len(df), len(list(self.ontor1.iter_ntriples())), "triples missing"
+        )
+        self.assertEqual(
+            list(df.columns),
+            ["subject", "predicate", "object", "literal"],
+            "columns not as expected",
+        )
+        self.assertIn(
+            ["pizza", "label", "thin crust pizza", True],
+            df.values.tolist(),
+            "literal with spaces not as expected",
+        )
+        self.assertIn(
+            ["pizza", "subClassOf", "food", False],
+            df.values.tolist(),
+            "names not as expected",
+        )
+
+    def test_node_coloring(self):
+        """test coloring of nodes by category"""
+        categories = self.ontor1._node_categories()
+        self.assertEqual(
+            [categories.get(n) for n in ["pizza", "John", "likes", "diameter_in_cm"]],
+            ["class", "instance", "object_property", "data_property"],
+            "node categories not as expected",
+        )
+        self.assertIn("restriction", categories.values(), "restrictions missing")
+        coloring = {
+            "class": "#000001",
+            "instance": "#000002",
+            "data_property": "#000003",
+            "restriction": "#000004",
+            "literal": "#000005",
+        }
+        nxgraph = self.ontor1._df_to_nx_incl_labels(
+            self.ontor1._ntriples_to_df(), coloring, categories
+        )
+        colors = nx.get_node_attributes(nxgraph, "color")
+        self.assertEqual(
+            [colors.get(n) for n in ["pizza", "John", "diameter_in_cm", "32", "likes"]],
+            ["#000001", "#000002", "#000003", "#000005", None],
+            "node colors not as expected",
+        )
+        self.assertIn(
+            "#000004", colors.values(), "restrictions not colored as expected"
+        )
+
+    def test_neighborhood(self):
+        """test neighborhood extraction around a focus node"""
+
+        def names(terms):
+            return [str(t).rsplit("#", 1)[-1] for t in terms]
+
+        self.assertEqual(
+            names(self.ontor1._neighborhood("John", 1, ["likes"])),
+            ["John", "NamedIndividual", "vegetarian", "His_pizza"],
+            "neighborhood not as expected",
+        )
+        self.assertIn(
+            "food",
+            names(self.ontor1._neighborhood("John", 6, ["likes"])),
+            "distant nodes not reached",
+        )
+        self.assertEqual(
+            names(self.ontor1._neighborhood("His_pizza", 1, ["likes"], "in")),
+            ["His_pizza", "John"],
+            "incoming relations not followed as expected",
+        )
+        self.assertEqual(
+            names(self.ontor1._neighborhood("John", 1, ["has_topping"])),
+            ["John", "NamedIndividual", "vegetarian"],
+            "properties not filtered as expected",
+        )
+        with self.assertRaises(ValueError):
+            self.ontor1._neighborhood("John", 1, direction="sideways")
+        body = self.ontor1._config_plot_query_body(focusnode="John", radius=6)
+        results = self.ontor1.query_onto(self.ontor1._build_query(body))
+        self.assertIn(
+            ("John", "likes", "His_pizza"),
+            [tuple(names(r)) for r in results],
+            "triples within radius not as expected",
+        )
+
+    def test_owlready_engine(self):
+        """test that the owlready engine yields the same results as rdflib"""
+        self.ontor1.add_label("pizza", "pizza", "en")
+        self.ontor1.add_instances([["Her_pizza", "margherita", "price", 9.5, "float"]])
+        queries = [
+            "SELECT ?c ?p WHERE { ?c rdfs:subClassOf ?p . }",
+            "SELECT ?s ?l WHERE { ?s rdfs:label ?l . }",
+            "SELECT ?i ?v WHERE { ?i :price ?v . }",
+            "SELECT (COUNT(?c) AS ?n) WHERE { ?c a owl:Class . }",
+            "SELECT ?x ?v WHERE { ?x xsd:minExclusive ?v . }",
+            self.ontor1._build_query(ontor.ontor._read_query("dp_axioms.sparql")),
+        ]
+        for query in queries[:-1]:
+            with self.assertNoLogs(self.ontor1.logger, "WARNING"):
+                results = self.ontor1.query_onto(query, engine="owlready")
+            self.assertEqual(
+                sorted(map(tuple, results)),
+                sorted(map(tuple, self.ontor1.query_onto(query))),
+                f"results of owlready engine not as expected for {query}",
+            )
+        with self.assertLogs(self.ontor1.logger, "WARNING"):
+            results = self.ontor1.query_onto(queries[-1], engine="owlready")
+        self.assertEqual(
+            sorted(map(tuple, results)),
+            sorted(map(tuple, self.ontor1.query_onto(queries[-1]))),
+            "results of rdflib fallback not as expected",
+        )
+        bindings = tuple(self.ontor1._rdflib_graph()[1].items())
+        self.assertEqual(
+            ontor.ontor._shared_optional_vars(
+                ontor.ontor._prepare_query(queries[-1], bindings).algebra
+            ),
+            {"?range"},
+            "query with shared optional variables not identified",
+        )
+        self.assertEqual(
+            ontor.ontor._computed_vars(
+                ontor.ontor._prepare_query(
+                    "SELECT ?c (COUNT(?i) AS ?n) (?n + 1 AS ?m) WHERE "
+                    "{ ?i a ?c . BIND(?c AS ?d) } GROUP BY ?c",
+                    bindings,
+                ).algebra
+            ),
+            {"n", "m"},
+            "computed variables not identified",
+        )
+        with unittest.mock.patch("rdflib.Graph.query") as rdflib_query:
+            results = self.ontor1.query_onto(
+                "SELECT ?c WHERE { ?c rdfs:subClassOf :margherita . }",
+                engine="owlready",
+            )
+            rdflib_query.assert_not_called()
+        self.assertEqual(results, [], "empty owlready results not as expected")
+
+    def test_pyvis_elements(self):
+        """test that nodes and edges are converted for pyvis like by pyvis"""
+        nxgraph = self.ontor1.build_graph(classes=["human", "pizza"])
+        net = ontor.ontor.Network(directed=True, font_color="#FFFFFF")
+        net.from_nx(nxgraph.copy())
+        nodes, edges = self.ontor1._pyvis_elements(nxgraph, "#FFFFFF")
+        self.assertEqual(
+            sorted(nodes, key=json.dumps),
+            sorted(net.nodes, key=json.dumps),
+            "nodes not converted like by pyvis",
+        )
+        self.assertEqual(
+            sorted(edges, key=json.dumps),
+            sorted(net.edges, key=json.dumps),
+            "edges not converted like by pyvis",
+        )
+
+    def test_layout(self):
+        """test html creation with node positions computed in advance"""
+        html_file = self.ontor1.path.rsplit(".", 1)[0] + ".html"
+        self.ontor1.visualize(classes=["human", "pizza"], layout="spring")
+        with open(html_file, encoding="utf-8") as f:
+            html = f.read()
+        self.assertIn('"x": ', html, "node positions not written")
+        self.assertIn('"enabled": false', html, "physics not disabled")
+        cached = self.ontor1._layout_cache
+        self.ontor1.visualize(classes=["human", "pizza"], layout="spring")
+        self.assertIs(self.ontor1._layout_cache, cached, "layout cache not reused")
+        with self.assertRaises(ValueError):
+            self.ontor1.visualize(classes=["human", "pizza"], layout="sideways")
+        # bespoke teardown
+        ensure_file_absent(html_file)
+
+    def test_aggregate(self):
+        """test collapsing instances and class subtrees for visu"""
+        self.ontor1.add_instances(
+            [
+                ["Her_pizza", "margherita", "diameter_in_cm", 30, "integer"],
+                ["Mary", "vegetarian", "likes", "Her_pizza", None],
+            ]
+        )
+        df, nodes = self.ontor1._aggregate_df(self.ontor1._ntriples_to_df())
+        self.assertEqual(
+            nodes["margherita instances"]["label"],
+            "margherita (2 instances)",
+            "instances not collapsed as expected",
+        )
+        self.assertIn(
+            ("vegetarian instances", "likes", "margherita instances", 2),
+            list(df[["subject", "predicate", "object", "weight"]].itertuples(False)),
+            "relations not merged as expected",
+        )
+        df, nodes = self.ontor1._aggregate_df(self.ontor1._ntriples_to_df(), 1)
+        self.assertEqual(
+            nodes["pizza"]["title"],
+            "margherita, pizza, vegetarian_pizza",
+            "class subtree not collapsed as expected",
+        )
+        self.assertEqual(
+            nodes["pizza instances diameter_in_cm"]["value"],
+            2,
+            "literals not collapsed as expected",
+        )
+        self.assertNotIn(
+            ("margherita", "subClassOf", "vegetarian_pizza"),
+            list(df[["subject", "predicate", "object"]].itertuples(False)),
+            "relations within subtree not dropped",
+        )
+        html_file = self.ontor1.path.rsplit(".", 1)[0] + ".html"
+        self.ontor1.visualize(classes=["human", "pizza"], aggregate=5)
+        with open(html_file, encoding="utf-8") as f:
+            self.assertIn("vegetarian (2 instances)", f.read(), "plot not aggregated")
+        self.ontor1.visualize(classes=["human", "pizza"], aggregate=1000)
+        with open(html_file, encoding="utf-8") as f:
+            self.assertNotIn("instances", f.read(), "small plot aggregated")
+        # bespoke teardown
+        ensure_file_absent(html_file)
+
+    def test_webgl(self):
+        """test visu output with data separated from the html page"""
+        stem = self.ontor1.path.rsplit(".", 1)[0]
+        self.ontor1.visualize(classes=["human", "pizza"], renderer="webgl")
+        with open(stem + "_data.js", encoding="utf-8") as f:
+            data = json.loads(f.read().split("=", 1)[1].rstrip().rstrip(";"))
+        self.assertIn("John", data["nodes"]["id"], "nodes not written")
+        self.assertIn("likes", data["predicates"], "edges not written")
+        self.assertEqual(
+            len(data["edges"]["source"]),
+            len(data["edges"]["target"]),
+            "edges not written as expected",
+        )
+        page = os.stat(stem + ".html").st_mtime_ns
+        self.ontor1.add_instances([["Mary", "vegetarian", None, None, None]])
+        self.ontor1.visualize(renderer="webgl", layout="random")
+        with open(stem + "_data.js", encoding="utf-8") as f:
+            self.assertIn('"Mary"', f.read(), "data file not rewritten")
+        self.assertEqual(
+            os.stat(stem + ".html").st_mtime_ns, page, "html page rewritten"
+        )
+        with self.assertRaises(ValueError):
+            self.ontor1.visualize(renderer="canvas")
+        with unittest.mock.patch.object(self.ontor1, "_default_layout_limit", 5):
+            with self.assertRaises(ValueError):
+                self.ontor1.visualize(renderer="webgl")
+        # bespoke teardown
+        ensure_file_absent(stem + ".html")
+        ensure_file_absent(stem + "_data.js")
+
+    def test_export_graph(self):
+        """test exporting the graph for visu without rendering it"""
+        self.ontor1.add_label("likes", "mag", "de")
+        self.ontor1.add_label("John", "Johann", "de")
+        graph = self.ontor1.build_graph(classes=["human", "pizza"], bylabel=True)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "graph.graphml")
+            self.ontor1.export_graph(path, classes=["human", "pizza"], bylabel=True)
+            exported = nx.read_graphml(path, force_multigraph=True)
+            self.assertEqual(
+                sorted(exported.edges(data="label")),
+                sorted(graph.edges(data="label")),
+                "graphml export not as expected",
+            )
+            path = os.path.join(tmpdir, "graph.tsv.gz")
+            self.ontor1.export_graph(path, classes=["human", "pizza"])
+            with gzip.open(path, "rt") as f:
+                self.assertIn(
+                    "John\tHis_pizza\tlikes\n", f.read(), "edge list not as expected"
+                )
+            path = os.path.join(tmpdir, "graph.gexf")
+            self.ontor1.export_graph(path, aggregate=0)
+            self.assertIn(
+                "vegetarian instances",
+                nx.read_gexf(path).nodes,
+                "gexf export not as expected",
+            )
+            with self.assertRaises(ValueError):
+                self.ontor1.export_graph(os.path.join(tmpdir, "graph.html"))
+
 
 # auxiliary functions for unit tests
 